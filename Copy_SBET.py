@@ -1,7 +1,7 @@
 import os
 import shutil
-import re
-from collections import defaultdict
+
+import nas_index
 
 
 def sync_sbet_files_recursively(main_folder: str):
@@ -21,17 +21,12 @@ def sync_sbet_files_recursively(main_folder: str):
     print(f"Recursively scanning main folder: {main_folder}")
 
     # --- Step 1: Index ALL data folders by a robust common key ---
-    data_index = defaultdict(list)
-    match_pattern = re.compile(r"(TECK_[tT]\d+(?:_F\d+)+_\d{4}_\d{2}_\d{2})", re.IGNORECASE)
-
+    # The shared directory index stores the parsed flight key of every folder,
+    # so only folders that changed since the last run are listed again.
     print("--- Indexing all potential data folders... ---")
-    for dirpath, dirnames, _ in os.walk(main_folder):
-        for dirname in dirnames:
-            match = match_pattern.search(dirname)
-            if match:
-                key = match.group(1).upper()
-                full_path = os.path.join(dirpath, dirname)
-                data_index[key].append(full_path)
+    index = nas_index.open_index()
+    nas_index.refresh_index(index, main_folder)
+    data_index = nas_index.find_flight_folders(index, main_folder)
 
     print(f"Found {len(data_index)} unique flight data groups.")
 
@@ -39,6 +34,7 @@ def sync_sbet_files_recursively(main_folder: str):
     print("\n--- Processing matched groups and copying files ---")
     if not data_index:
         print("No data folders matching the pattern were found. Nothing to do.")
+        index.close()
         return
 
     for key, path_list in data_index.items():
@@ -59,16 +55,11 @@ def sync_sbet_files_recursively(main_folder: str):
 
         # 1. Create a list to hold ALL SBET files found.
         sbet_files_to_copy = []
-        try:
-            for filename in os.listdir(vnir_path):
-                if filename.lower().startswith('sbet'):
-                    # 2. Add every matching file to the list.
-                    sbet_files_to_copy.append(filename)
-            # 3. The 'break' statement is removed.
-
-        except FileNotFoundError:
-            print(f"  -> Error: Could not access folder '{vnir_path}'. Skipping.")
-            continue
+        for filename in sorted(nas_index.list_files(index, vnir_path)):
+            if filename.lower().startswith('sbet'):
+                # 2. Add every matching file to the list.
+                sbet_files_to_copy.append(filename)
+        # 3. The 'break' statement is removed.
 
         # 4. Check if the LIST is empty.
         if not sbet_files_to_copy:
@@ -89,6 +80,8 @@ def sync_sbet_files_recursively(main_folder: str):
             except Exception as e:
                 print(f"    -> Error: Failed to copy file '{sbet_filename}'. Reason: {e}")
 
+    index.close()
+
 
 if __name__ == "__main__":
     main_folder_path = r"Y:\TECK_WHITE_EARTH\TECK_HYPERSPEC"
@@ -1,113 +1,421 @@
-import os, uuid, time
-from qgis.core import QgsProcessingFeedback, QgsVectorLayer, QgsProject
-import processing
+import os, csv, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from osgeo import gdal, ogr, osr
 
 inputroot = r"E:\hyspex_shp_files\sept_15_flt_2_new"
 output_root = r"E:\hyspex_shp_files\output_3"
 
-os.makedirs(output_root, exist_ok=True)
-fb = QgsProcessingFeedback()
+# Polygons larger than this (in squared CRS units, m² for our UTM rasters) are dropped
+MAX_POLYGON_AREA = 4
+
+# GDAL block cache per worker process
+WORKER_GDAL_CACHE_MB = 256
+
+# Rasters with more pixels than this are polygonized in TILE_SIZE x TILE_SIZE tiles
+TILED_MIN_PIXELS = 10000 * 10000
+TILE_SIZE = 4096
+TIMINGS_CSV_NAME = "polygonize_timings.csv"
+
 
 def safe_name(path):
     return os.path.splitext(os.path.basename(path))[0].replace(" ", "_")
 
-def clean_temp_files(base_path, max_retries=3):
-    """Safely remove temporary shapefile components with retries"""
-    extensions = ['.shp', '.shx', '.dbf', '.prj', '.cpg']
-    for ext in extensions:
-        temp_file = base_path.replace('.shp', ext)
-        if os.path.exists(temp_file):
-            for attempt in range(max_retries):
-                try:
-                    os.remove(temp_file)
-                    break
-                except PermissionError:
-                    if attempt == max_retries - 1:
-                        print(f"⚠ Could not delete temporary file {temp_file}")
-                    else:
-                        time.sleep(0.1)
-
-for dirpath, dirnames, files in os.walk(inputroot):
-    for fname in files:
-        if not fname.lower().endswith(".bsq"):
+
+def output_path_for(raster_path, input_root, out_root):
+    """
+    Deterministic output shapefile for a raster: its path relative to input_root with
+    the folder separators replaced by '__' (just the file name for rasters directly
+    in input_root), so reruns overwrite instead of piling up suffixed copies.
+    """
+    relative = os.path.splitext(os.path.relpath(raster_path, input_root))[0]
+    return os.path.join(out_root, relative.replace(os.sep, "__").replace(" ", "_") + ".shp")
+
+
+def find_rasters(input_root):
+    rasters = []
+    for dirpath, dirnames, files in os.walk(input_root):
+        for fname in files:
+            if fname.lower().endswith(".bsq"):
+                rasters.append(os.path.join(dirpath, fname))
+    return sorted(rasters)
+
+
+def polygonize_to_memory(raster_path, band_index=1):
+    """
+    Polygonizes one band into an in-memory OGR layer with a 'DN' field, using the
+    band's mask like gdal:polygonize (4-connectedness). Returns (datasource, layer);
+    keep the datasource referenced while the layer is used.
+    """
+    src = gdal.Open(raster_path, gdal.GA_ReadOnly)
+    mem_ds, layer = _polygonize_dataset(src, band_index)
+    src = None
+    return mem_ds, layer
+
+
+def _polygonize_dataset(src, band_index=1):
+    band = src.GetRasterBand(band_index)
+    srs = osr.SpatialReference(wkt=src.GetProjection()) if src.GetProjection() else None
+
+    mem_ds = ogr.GetDriverByName("Memory").CreateDataSource("")
+    layer = mem_ds.CreateLayer("poly", srs=srs, geom_type=ogr.wkbPolygon)
+    layer.CreateField(ogr.FieldDefn("DN", ogr.OFTInteger))
+    gdal.Polygonize(band, band.GetMaskBand(), layer, 0, [], callback=None)
+    return mem_ds, layer
+
+
+def dissolve_small_polygons(layer, max_area=MAX_POLYGON_AREA):
+    """
+    Unions every polygon of the layer with an area <= max_area into one geometry
+    (the attribute filter on OGR_GEOM_AREA skips the rest while reading).
+
+    Returns:
+        tuple: (dissolved geometry or None, DN of the first kept polygon, polygons kept)
+    """
+    layer.SetAttributeFilter(f"OGR_GEOM_AREA <= {max_area}")
+    collection = ogr.Geometry(ogr.wkbMultiPolygon)
+    first_dn = None
+    kept = 0
+    for feature in layer:
+        geom = feature.GetGeometryRef()
+        if geom is None:
+            continue
+        if first_dn is None:
+            first_dn = feature.GetField("DN")
+        collection.AddGeometry(geom)
+        kept += 1
+    layer.SetAttributeFilter(None)
+    if kept == 0:
+        return None, None, 0
+    return collection.UnionCascaded(), first_dn, kept
+
+
+def write_dissolved(out_path, geometry, dn, srs):
+    """Writes the dissolved geometry as a single-feature shapefile (no feature if geometry is None)."""
+    driver = ogr.GetDriverByName("ESRI Shapefile")
+    if os.path.exists(out_path):
+        driver.DeleteDataSource(out_path)
+    out_ds = driver.CreateDataSource(out_path)
+    out_layer = out_ds.CreateLayer(safe_name(out_path), srs=srs, geom_type=ogr.wkbMultiPolygon)
+    out_layer.CreateField(ogr.FieldDefn("DN", ogr.OFTInteger))
+    if geometry is not None:
+        feature = ogr.Feature(out_layer.GetLayerDefn())
+        feature.SetField("DN", dn)
+        feature.SetGeometry(ogr.ForceToMultiPolygon(geometry))
+        out_layer.CreateFeature(feature)
+        feature = None
+    count = out_layer.GetFeatureCount()
+    out_ds = None
+    return count
+
+
+def polygonize_filter_dissolve(raster_path, out_path, max_area=MAX_POLYGON_AREA, band_index=1):
+    """
+    Polygonize -> keep polygons with area <= max_area -> dissolve, for one raster,
+    entirely in memory: only the final shapefile is written to disk.
+
+    Returns:
+        dict: 'polygons' created, 'kept', 'written' features and the seconds spent
+              in each stage ('polygonize_s', 'dissolve_s', 'write_s').
+    """
+    result = {"polygons": 0, "kept": 0, "written": 0, "polygonize_s": 0.0, "dissolve_s": 0.0, "write_s": 0.0}
+
+    start = time.perf_counter()
+    mem_ds, layer = polygonize_to_memory(raster_path, band_index)
+    result["polygons"] = layer.GetFeatureCount()
+    result["polygonize_s"] = round(time.perf_counter() - start, 3)
+    if result["polygons"] == 0:
+        return result
+
+    start = time.perf_counter()
+    geometry, dn, result["kept"] = dissolve_small_polygons(layer, max_area)
+    result["dissolve_s"] = round(time.perf_counter() - start, 3)
+
+    start = time.perf_counter()
+    result["written"] = write_dissolved(out_path, geometry, dn, layer.GetSpatialRef())
+    result["write_s"] = round(time.perf_counter() - start, 3)
+    mem_ds = None
+    return result
+
+
+def tile_windows(xsize, ysize, tile_size=TILE_SIZE):
+    """Pixel windows (xoff, yoff, width, height) covering the raster without overlap."""
+    return [(x, y, min(tile_size, xsize - x), min(tile_size, ysize - y))
+            for y in range(0, ysize, tile_size) for x in range(0, xsize, tile_size)]
+
+
+def _seam_contacts(geom, raster_gt, window, xsize, ysize):
+    """
+    Where a tile polygon's outer ring runs along an inner tile edge, as
+    (seam key, first pixel, last pixel, side) in whole-raster pixel coordinates.
+    Seam keys are ('v', pixel column) or ('h', pixel row); side tells on which side
+    of the seam the tile lies. Polygons touching a seam only at a corner are not
+    connected across it (4-connected polygonize), so they get no contact.
+    """
+    xoff, yoff, width, height = window
+    edges = []
+    if xoff > 0:
+        edges.append((0, xoff, 1))
+    if xoff + width < xsize:
+        edges.append((0, xoff + width, 0))
+    if yoff > 0:
+        edges.append((1, yoff, 1))
+    if yoff + height < ysize:
+        edges.append((1, yoff + height, 0))
+    if not edges:
+        return []
+
+    ring = geom.GetGeometryRef(0).GetPoints()
+    pixels = [(round((p[0] - raster_gt[0]) / raster_gt[1]), round((p[1] - raster_gt[3]) / raster_gt[5]))
+              for p in ring]
+    contacts = []
+    for a, b in zip(pixels, pixels[1:]):
+        for axis, position, side in edges:
+            if a[axis] == b[axis] == position and a != b:
+                along = 1 - axis
+                contacts.append((('v' if axis == 0 else 'h', position),
+                                 min(a[along], b[along]), max(a[along], b[along]), side))
+    return contacts
+
+
+def _polygonize_tile(raster_path, window, max_area, band_index=1):
+    """
+    Polygonizes band band_index of one tile. Polygons that run along an inner
+    tile edge continue in the neighbouring tile, so they are returned for the seam
+    merge as (DN, area, seam contacts, WKB); the WKB is only sent for pieces small
+    enough to pass the area filter. All other polygons are complete and are filtered and
+    unioned here.
+
+    Returns:
+        tuple: (union of the kept interior polygons as WKB or None, DN of the first kept
+                polygon, polygons created, interior polygons kept, seam pieces)
+    """
+    src = gdal.Open(raster_path, gdal.GA_ReadOnly)
+    xsize, ysize = src.RasterXSize, src.RasterYSize
+    raster_gt = src.GetGeoTransform()
+    xoff, yoff, width, height = window
+    # Only the polygonized band is copied; it is band 1 of the tile
+    tile = gdal.Translate("", src, format="MEM", srcWin=[xoff, yoff, width, height], bandList=[band_index])
+    src = None
+    mem_ds, layer = _polygonize_dataset(tile)
+
+    collection = ogr.Geometry(ogr.wkbMultiPolygon)
+    seam = []
+    first_dn = None
+    n_polygons = kept = 0
+    for feature in layer:
+        geom = feature.GetGeometryRef()
+        if geom is None:
             continue
+        n_polygons += 1
+        area = geom.GetArea()
+        contacts = _seam_contacts(geom, raster_gt, window, xsize, ysize)
+        if contacts:
+            seam.append((feature.GetField("DN"), area, contacts, geom.ExportToWkb() if area <= max_area else None))
+        elif area <= max_area:
+            if first_dn is None:
+                first_dn = feature.GetField("DN")
+            collection.AddGeometry(geom)
+            kept += 1
+    union = collection.UnionCascaded().ExportToWkb() if kept else None
+    mem_ds = tile = None
+    return union, first_dn, n_polygons, kept, seam
+
+
+def _merge_seam_polygons(seam, max_area):
+    """
+    Stitches the seam pieces of all tiles: pieces with the same DN whose contacts
+    overlap on the same seam from opposite sides are one polygon of the single-pass
+    polygonize. Each such polygon's area is the sum of its pieces' areas, so a
+    polygon is dropped as soon as it holds a piece above max_area, and only the
+    pieces of the kept polygons are returned, for the final dissolve.
 
-        raster_path = os.path.join(dirpath, fname)
-        out_path = os.path.join(output_root, safe_name(fname) + ".shp")
-        
-        if os.path.exists(out_path):
-            out_path = os.path.join(
-                output_root,
-                f"{safe_name(fname)}_{uuid.uuid4().hex[:6]}.shp"
-            )
-
-        print(f"▶ Processing {raster_path}")
-
-        # Step 1: Polygonize to temporary file
-        temp_poly_path = os.path.join(output_root, f"temp_poly_{uuid.uuid4().hex[:8]}.shp")
-        processing.run(
-            "gdal:polygonize",
-            {
-                "INPUT": raster_path,
-                "BAND": 1,
-                "FIELD": "DN",
-                "EIGHT_CONNECTEDNESS": False,
-                "EXTRA": "",
-                "OUTPUT": temp_poly_path
-            },
-            feedback=fb
-        )
-
-        # Step 2: Load and validate
-        poly_layer = QgsVectorLayer(temp_poly_path, "temp_poly", "ogr")
-        if not poly_layer.isValid():
-            print(f"⚠ Failed to load polygonized layer for {fname}")
-            clean_temp_files(temp_poly_path)
+    Returns:
+        tuple: (list of the kept pieces as ogr polygons, DN of the first kept polygon,
+                polygons rebuilt, polygons kept)
+    """
+    parent = list(range(len(seam)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    by_seam = {}
+    for piece, (dn, _, contacts, _) in enumerate(seam):
+        for key, first, last, side in contacts:
+            by_seam.setdefault((key, dn), []).append((first, last, side, piece))
+    for intervals in by_seam.values():
+        intervals.sort()
+        for i, (_, last, side, piece) in enumerate(intervals):
+            for other_first, _, other_side, other in intervals[i + 1:]:
+                if other_first >= last:
+                    break
+                if other_side != side:
+                    parent[find(other)] = find(piece)
+
+    components = {}
+    for piece, (dn, area, _, wkb) in enumerate(seam):
+        component = components.setdefault(find(piece), {"dn": dn, "area": 0.0, "pieces": []})
+        component["area"] += area
+        component["pieces"].append(wkb)
+
+    kept, first_dn, n_kept = [], None, 0
+    for root in sorted(components):
+        component = components[root]
+        if component["area"] > max_area or any(wkb is None for wkb in component["pieces"]):
             continue
+        if first_dn is None:
+            first_dn = component["dn"]
+        n_kept += 1
+        kept.extend(ogr.CreateGeometryFromWkb(wkb) for wkb in component["pieces"])
+    return kept, first_dn, len(components), n_kept
+
+
+def polygonize_filter_dissolve_tiled(raster_path, out_path, max_area=MAX_POLYGON_AREA,
+                                     tile_size=TILE_SIZE, max_workers=None, band_index=1):
+    """
+    Same result as polygonize_filter_dissolve(), for rasters too large to polygonize
+    in one piece: tiles are polygonized in parallel with bounded memory, polygons
+    cut by tile seams are stitched back together by DN before the area filter, and
+    everything kept is dissolved into the final shapefile.
 
-        if poly_layer.featureCount() == 0:
-            print(f"⚠ No features created from {fname}, skipping")
-            clean_temp_files(temp_poly_path)
+    Returns:
+        dict: Same keys as polygonize_filter_dissolve().
+    """
+    result = {"polygons": 0, "kept": 0, "written": 0, "polygonize_s": 0.0, "dissolve_s": 0.0, "write_s": 0.0}
+    src = gdal.Open(raster_path, gdal.GA_ReadOnly)
+    windows = tile_windows(src.RasterXSize, src.RasterYSize, tile_size)
+    srs = osr.SpatialReference(wkt=src.GetProjection()) if src.GetProjection() else None
+    src = None
+
+    start = time.perf_counter()
+    tile_results = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_polygonize_tile, raster_path, window, max_area, band_index) for window in windows]
+        for future in futures:
+            tile_results.append(future.result())
+    result["polygonize_s"] = round(time.perf_counter() - start, 3)
+
+    start = time.perf_counter()
+    collection = ogr.Geometry(ogr.wkbMultiPolygon)
+    seam = []
+    first_dn = None
+    for union, tile_dn, n_polygons, kept, tile_seam in tile_results:
+        result["kept"] += kept
+        result["polygons"] += n_polygons - len(tile_seam)
+        seam.extend(tile_seam)
+        if union is not None:
+            if first_dn is None:
+                first_dn = tile_dn
+            collection.AddGeometry(ogr.CreateGeometryFromWkb(union))
+    seam_kept, seam_dn, rebuilt, seam_kept_polygons = _merge_seam_polygons(seam, max_area)
+    result["polygons"] += rebuilt
+    result["kept"] += seam_kept_polygons
+    for part in seam_kept:
+        collection.AddGeometry(part)
+    if first_dn is None:
+        first_dn = seam_dn
+    geometry = collection.UnionCascaded() if collection.GetGeometryCount() else None
+    result["dissolve_s"] = round(time.perf_counter() - start, 3)
+    if result["polygons"] == 0:
+        return result
+
+    start = time.perf_counter()
+    result["written"] = write_dissolved(out_path, geometry, first_dn, srs)
+    result["write_s"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def _init_worker():
+    gdal.UseExceptions()
+    gdal.SetCacheMax(WORKER_GDAL_CACHE_MB * 1024 * 1024)
+
+
+def _process_raster(raster_path, out_path):
+    """Runs the pipeline on one raster in a worker and returns its timing row."""
+    start = time.perf_counter()
+    row = {"raster": raster_path, "output": out_path, "status": "done", "error": ""}
+    try:
+        row.update(polygonize_filter_dissolve(raster_path, out_path))
+        if row["polygons"] == 0:
+            row["status"] = "empty"
+    except Exception as e:
+        row.update(status="failed", error=str(e))
+    row["total_s"] = round(time.perf_counter() - start, 3)
+    return row
+
+
+def run_batch(input_root, out_root, max_workers=None, skip_existing=True):
+    """
+    Polygonizes every .bsq under input_root across a process pool (one raster per
+    task, GDAL initialised once per worker) and writes a CSV of per-file stage
+    timings to out_root.
+
+    Args:
+        input_root (str): Folder searched recursively for .bsq rasters.
+        out_root (str): Folder for the shapefiles and the timings CSV.
+        max_workers (int): Worker processes; defaults to one per core.
+        skip_existing (bool): Skip rasters whose output is newer than the raster.
+    """
+    os.makedirs(out_root, exist_ok=True)
+    gdal.UseExceptions()
+    jobs, tiled_jobs = [], []
+    for raster_path in find_rasters(input_root):
+        out_path = output_path_for(raster_path, input_root, out_root)
+        if skip_existing and os.path.exists(out_path) and os.path.getmtime(out_path) >= os.path.getmtime(raster_path):
+            print(f"Skipped (up to date): {out_path}")
             continue
+        src = gdal.Open(raster_path, gdal.GA_ReadOnly)
+        is_large = src.RasterXSize * src.RasterYSize > TILED_MIN_PIXELS
+        src = None
+        (tiled_jobs if is_large else jobs).append((raster_path, out_path))
+    if not jobs and not tiled_jobs:
+        print("Nothing to process.")
+        return
+
+    rows = []
+    batch_start = time.perf_counter()
 
-        # Step 3: Filter by area (<= 4 m²)
-        temp_filtered_path = os.path.join(output_root, f"temp_filtered_{uuid.uuid4().hex[:8]}.shp")
-        processing.run(
-            "native:extractbyexpression",
-            {
-                "INPUT": temp_poly_path,
-                "EXPRESSION": "$area <= 4",
-                "OUTPUT": temp_filtered_path
-            },
-            feedback=fb
-        )
-
-        # Clean up polygonized temp file immediately
-        clean_temp_files(temp_poly_path)
-
-        # Step 4: Dissolve remaining features
-        processing.run(
-            "native:dissolve",
-            {
-                "INPUT": temp_filtered_path,
-                "FIELD": [],  # Dissolve all features together
-                "OUTPUT": out_path
-            },
-            feedback=fb
-        )
-
-        # Clean up filtered temp file
-        clean_temp_files(temp_filtered_path)
-
-        # Verify final output
-        if os.path.exists(out_path):
-            final_layer = QgsVectorLayer(out_path, "result", "ogr")
-            if final_layer.isValid():
-                print(f"✓ Saved output with {final_layer.featureCount()} features ➜ {out_path}")
+    # Large rasters one at a time, each split into tiles across all workers
+    for raster_path, out_path in tiled_jobs:
+        print(f"▶ Processing {raster_path} in {TILE_SIZE} x {TILE_SIZE} tiles")
+        start = time.perf_counter()
+        row = {"raster": raster_path, "output": out_path, "status": "done", "error": ""}
+        try:
+            row.update(polygonize_filter_dissolve_tiled(raster_path, out_path, max_workers=max_workers))
+            if row["polygons"] == 0:
+                row["status"] = "empty"
+        except Exception as e:
+            row.update(status="failed", error=str(e))
+        row["total_s"] = round(time.perf_counter() - start, 3)
+        rows.append(row)
+        print(f"  {row['status']}: {row.get('written', 0)} feature(s) in {row['total_s']} s")
+
+    print(f"Processing {len(jobs)} raster(s) with {max_workers or os.cpu_count()} worker process(es)...")
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_process_raster, raster_path, out_path) for raster_path, out_path in jobs]
+        for i, future in enumerate(as_completed(futures), 1):
+            row = future.result()
+            rows.append(row)
+            name = os.path.basename(row["raster"])
+            if row["status"] == "done":
+                print(f"[{i}/{len(jobs)}] ✓ {name}: {row['written']} feature(s) ({row['kept']} of {row['polygons']} "
+                      f"polygons <= {MAX_POLYGON_AREA} m²) in {row['total_s']} s ➜ {row['output']}")
+            elif row["status"] == "empty":
+                print(f"[{i}/{len(jobs)}] ⚠ No features created from {name}, skipping")
             else:
-                print(f"⚠ Final output is invalid for {fname}")
-            del final_layer
-        else:
-            print(f"⚠ Failed to create output for {fname}")
+                print(f"[{i}/{len(jobs)}] ⚠ Failed to process {name}: {row['error']}")
+
+    fieldnames = ["raster", "output", "status", "polygons", "kept", "written",
+                  "polygonize_s", "dissolve_s", "write_s", "total_s", "error"]
+    timings_csv = os.path.join(out_root, TIMINGS_CSV_NAME)
+    with open(timings_csv, mode='w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(sorted(rows, key=lambda r: r["raster"]))
+    print(f"Processing complete in {time.perf_counter() - batch_start:.1f} s. Timings written to {timings_csv}")
+
 
-print("Processing complete.")
\ No newline at end of file
+if __name__ == "__main__":
+    run_batch(inputroot, output_root)
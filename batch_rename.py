@@ -0,0 +1,221 @@
+import os
+import re
+import json
+import time
+import shutil
+
+import bulk_mover
+
+# Files that belong to a primary file and must follow it: 'A8.jpeg.aux.xml' goes with 'A8.jpeg'.
+SIDECAR_SUFFIXES = ('.aux.xml', '.ovr', '.msk')
+
+JOURNAL_PREFIX = ".rename_journal_"
+
+
+def natural_sort_key(s):
+    # This function will create a sort key that handles numbers properly
+    return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', s)]
+
+
+# --- Rules: each returns a function (file name, position in the plan) -> new file name ---
+
+def prefix_rule(prefix):
+    """'tile_01.laz' -> '<prefix>tile_01.laz'"""
+    return lambda name, i: prefix + name
+
+
+def replace_rule(old, new):
+    """Replaces every occurrence of 'old' in the name."""
+    return lambda name, i: name.replace(old, new)
+
+
+def regex_rule(pattern, replacement):
+    """re.sub on the name, e.g. regex_rule(r'^Aurora_Hillshade_', 'Aurora_DEM_')."""
+    compiled = re.compile(pattern)
+    return lambda name, i: compiled.sub(replacement, name)
+
+
+def sequence_rule(template, start=1):
+    """
+    Numbers the files in plan order, keeping their extension:
+    sequence_rule('A{n}', start=8) gives 'A8.jpeg', 'A9.jpeg', 'A10.jpeg', ...
+    """
+    def rule(name, i):
+        _, ext = split_name(name)
+        return template.format(n=start + i) + ext
+    return rule
+
+
+def split_name(name):
+    """Splits 'A8.jpeg' into ('A8', '.jpeg') and 'A8.jpeg.aux.xml' into ('A8.jpeg', '.aux.xml')."""
+    for suffix in SIDECAR_SUFFIXES:
+        if name.lower().endswith(suffix):
+            return name[:-len(suffix)], suffix
+    return os.path.splitext(name)
+
+
+def build_plan(folder, extensions, rule, name_filter=None, output_folder=None):
+    """
+    Builds the full rename plan for a folder without touching anything.
+
+    Args:
+        folder (str): Folder holding the deliverables.
+        extensions (tuple): Primary file extensions, e.g. ('.laz',) or ('.jpeg', '.tiff').
+        rule (callable): (name, index) -> new name, see the *_rule functions.
+        name_filter (str): Optional regex; only primaries whose name matches are renamed.
+        output_folder (str): Where the renamed files go. Defaults to 'folder' (in place).
+
+    Returns:
+        list: (source path, destination path) pairs, each primary followed by its sidecars.
+    """
+    output_folder = output_folder or folder
+    extensions = tuple(e.lower() for e in extensions)
+    names = set(os.listdir(folder))
+    pattern = re.compile(name_filter) if name_filter else None
+
+    primaries = sorted((n for n in names
+                        if n.lower().endswith(extensions) and split_name(n)[1] not in SIDECAR_SUFFIXES
+                        and (pattern is None or pattern.search(n))),
+                       key=natural_sort_key)
+    # Sidecars are matched case-insensitively, like split_name(): 'B1.JPEG.AUX.XML' goes with 'B1.jpeg'
+    by_lower = {n.lower(): n for n in names}
+    plan = []
+    for i, name in enumerate(primaries):
+        new_name = rule(name, i)
+        plan.append((os.path.join(folder, name), os.path.join(output_folder, new_name)))
+        for suffix in SIDECAR_SUFFIXES:
+            sidecar = by_lower.get((name + suffix).lower())
+            if sidecar is not None:
+                plan.append((os.path.join(folder, sidecar),
+                             os.path.join(output_folder, new_name + sidecar[len(name):])))
+    return [(src, dst) for src, dst in plan if src != dst]
+
+
+def check_plan(plan):
+    """
+    Returns a list of problems that would make the plan unsafe: two files renamed to
+    the same name, or a destination that already exists and is not itself renamed
+    away by the plan.
+    """
+    problems = []
+    sources = {os.path.normcase(src) for src, _ in plan}
+    seen = {}
+    for src, dst in plan:
+        key = os.path.normcase(dst)
+        if key in seen:
+            problems.append(f"'{os.path.basename(src)}' and '{os.path.basename(seen[key])}' "
+                            f"would both become '{os.path.basename(dst)}'")
+        seen[key] = src
+        if os.path.exists(dst) and key not in sources:
+            problems.append(f"'{dst}' already exists")
+    return problems
+
+
+def print_plan(plan):
+    for src, dst in plan:
+        print(f"{os.path.basename(src)}  ->  {dst if os.path.dirname(src) != os.path.dirname(dst) else os.path.basename(dst)}")
+    print(f"{len(plan)} file(s) in plan.")
+
+
+def _journal(journal, done, op, source, destination):
+    journal.write(json.dumps({"op": op, "from": source, "to": destination}) + "\n")
+    journal.flush()
+    done.append({"op": op, "from": source, "to": destination})
+
+
+def _revert(steps):
+    """Reverts journaled steps, newest first: renames are renamed back, copies removed."""
+    for step in reversed(steps):
+        if step["op"] == "rename":
+            os.rename(step["to"], step["from"])
+        elif step["op"] == "copy" and os.path.exists(step["to"]):
+            os.remove(step["to"])
+
+
+def apply_plan(plan, journal_path):
+    """
+    Executes a checked plan in one pass, recording every step in a journal so it
+    can be undone with undo_plan(). Same-volume moves are renames; only moves to
+    another volume are copies (the originals are then left in place). When some
+    destinations are also sources (e.g. A8->A9, A9->A10), everything is first
+    renamed to temporary names so no file is overwritten. If a step fails, the
+    steps already done are reverted (like shapefile_batch._move_all), the journal
+    is deleted and the error is re-raised, so the tree is never left half-renamed.
+    """
+    problems = check_plan(plan)
+    if problems:
+        raise ValueError("Unsafe rename plan:\n  " + "\n  ".join(problems))
+
+    for dst_dir in {os.path.dirname(dst) for _, dst in plan}:
+        os.makedirs(dst_dir, exist_ok=True)
+
+    sources = {os.path.normcase(src) for src, _ in plan}
+    chained = any(os.path.normcase(dst) in sources for _, dst in plan)
+    renamed = copied = 0
+    done = []
+    try:
+        with open(journal_path, 'a') as journal:
+            steps = []
+            for src, dst in plan:
+                if not bulk_mover.same_filesystem(src, os.path.dirname(dst)):
+                    # Journaled before copying, so a half-written copy is removed by the rollback
+                    _journal(journal, done, "copy", src, dst)
+                    shutil.copy2(src, dst)
+                    copied += 1
+                elif chained:
+                    temp = os.path.join(os.path.dirname(src), f".renaming_{os.getpid()}_{len(steps)}_{os.path.basename(src)}")
+                    os.rename(src, temp)
+                    _journal(journal, done, "rename", src, temp)
+                    steps.append((temp, dst))
+                else:
+                    os.rename(src, dst)
+                    _journal(journal, done, "rename", src, dst)
+                    renamed += 1
+            for temp, dst in steps:
+                os.rename(temp, dst)
+                _journal(journal, done, "rename", temp, dst)
+                renamed += 1
+    except (OSError, shutil.Error):
+        print(f"Rename failed after {len(done)} step(s), reverting them.")
+        _revert(done)
+        os.remove(journal_path)
+        raise
+    print(f"Renamed {renamed} file(s), copied {copied} to another volume. Journal: {journal_path}")
+
+
+def undo_plan(journal_path):
+    """Reverts every step recorded in a journal, newest first, then deletes the journal."""
+    with open(journal_path) as journal:
+        steps = [json.loads(line) for line in journal if line.strip()]
+    _revert(steps)
+    os.remove(journal_path)
+    print(f"Undid {len(steps)} step(s).")
+
+
+def rename_files(folder, extensions, rule, name_filter=None, output_folder=None, dry_run=True):
+    """
+    Plans the renames, prints them and, unless dry_run, applies them. Returns the
+    journal path (None for a dry run or an empty plan).
+    """
+    plan = build_plan(folder, extensions, rule, name_filter, output_folder)
+    print_plan(plan)
+    problems = check_plan(plan)
+    for problem in problems:
+        print(f"Collision: {problem}")
+    if dry_run or not plan or problems:
+        if dry_run:
+            print("Dry run: nothing was renamed.")
+        return None
+
+    journal_path = os.path.join(folder, f"{JOURNAL_PREFIX}{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+    apply_plan(plan, journal_path)
+    return journal_path
+
+
+if __name__ == "__main__":
+    # Set the directory containing the files
+    folder_path = r"D:\Deliverables\Aurora ground pointcloud tiles again"
+
+    # e.g. prefix_rule("White_Earth_surface_pointcloud_Tile_"), replace_rule("Convert to Las", "Aurora_ground_pointcloud"),
+    # regex_rule(r"^Aurora_Hillshade_", "Aurora_DEM_") or sequence_rule("A{n}", start=8) with name_filter=r"^A8"
+    rename_files(folder_path, ('.laz',), prefix_rule("White_Earth_surface_pointcloud_Tile_"), dry_run=True)
@@ -0,0 +1,148 @@
+import os
+import re
+import csv
+import time
+import ctypes
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from osgeo import gdal
+
+from veg_detector import tiff_to_rockveg_grayscale_tiled, rockveg_output_path
+
+# Headwall VNIR cubes are named raw_<number>.tif; this excludes our own outputs.
+CUBE_PATTERN = re.compile(r"^raw_\d+\.tif$", re.IGNORECASE)
+
+# GDAL block cache per worker, and the memory budgeted for each worker when sizing
+# the pool (cache + a few float32 windows of a full-width cube).
+WORKER_GDAL_CACHE_MB = 256
+MEMORY_PER_WORKER_MB = 768
+
+SUMMARY_CSV_NAME = "veg_detector_summary.csv"
+
+
+def find_vnir_cubes(date_folder):
+    """Returns the sorted paths of every raw_*.tif VNIR cube under date_folder."""
+    cubes = []
+    for dirpath, _, filenames in os.walk(date_folder):
+        for filename in filenames:
+            if CUBE_PATTERN.match(filename):
+                cubes.append(os.path.join(dirpath, filename))
+    return sorted(cubes)
+
+
+def is_up_to_date(input_tif):
+    """True if the grayscale output exists and is newer than its cube."""
+    output_tif = rockveg_output_path(input_tif)
+    return os.path.exists(output_tif) and os.path.getmtime(output_tif) >= os.path.getmtime(input_tif)
+
+
+def available_memory_bytes():
+    """Physical memory currently available, or None if it cannot be determined."""
+    if os.name == 'nt':
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                        ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                        ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                        ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                        ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+        return None
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def choose_worker_count(memory_per_worker_mb=MEMORY_PER_WORKER_MB):
+    """Number of worker processes: one per core, capped by the available RAM."""
+    workers = os.cpu_count() or 1
+    available = available_memory_bytes()
+    if available:
+        workers = min(workers, int(available // (memory_per_worker_mb * 1024 * 1024)))
+    return max(1, workers)
+
+
+def _init_worker():
+    gdal.UseExceptions()
+    gdal.SetCacheMax(WORKER_GDAL_CACHE_MB * 1024 * 1024)
+
+
+def _process_cube(input_tif):
+    """Runs the block-streamed veg detector on one cube and returns its summary row."""
+    input_mb = os.path.getsize(input_tif) / 1e6
+    start = time.time()
+    try:
+        output_tif = tiff_to_rockveg_grayscale_tiled(input_tif)
+        status, error = "done", ""
+    except Exception as e:
+        output_tif, status, error = "", "failed", str(e)
+    seconds = time.time() - start
+    return {
+        "input": input_tif,
+        "output": output_tif,
+        "status": status,
+        "seconds": round(seconds, 2),
+        "input_mb": round(input_mb, 1),
+        "mb_per_s": round(input_mb / seconds, 1) if seconds > 0 else "",
+        "error": error,
+    }
+
+
+def run_veg_detector_batch(date_folder, max_workers=None, summary_csv=None):
+    """
+    Runs the rock/vegetation detector on every VNIR cube of an acquisition day
+    (e.g. '...\\0702\\T1_VNIR') across a process pool. Cubes whose output is newer
+    than the cube are skipped. A CSV with per-file timings and throughput is
+    written at the end.
+
+    Args:
+        date_folder (str): Folder searched recursively for raw_*.tif cubes.
+        max_workers (int): Worker processes. Defaults to one per core, capped by free RAM.
+        summary_csv (str): Defaults to 'veg_detector_summary.csv' in date_folder.
+    """
+    if not os.path.isdir(date_folder):
+        print(f"Error: The specified folder does not exist: '{date_folder}'")
+        return
+
+    cubes = find_vnir_cubes(date_folder)
+    to_process = [c for c in cubes if not is_up_to_date(c)]
+    print(f"Found {len(cubes)} cube(s); {len(cubes) - len(to_process)} already up to date.")
+    if not to_process:
+        return
+
+    workers = max_workers or choose_worker_count()
+    workers = min(workers, len(to_process))
+    print(f"Processing {len(to_process)} cube(s) with {workers} worker process(es)...")
+
+    rows = []
+    batch_start = time.time()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_process_cube, cube) for cube in to_process]
+        for i, future in enumerate(as_completed(futures), 1):
+            row = future.result()
+            rows.append(row)
+            if row["status"] == "done":
+                print(f"[{i}/{len(to_process)}] ✓ {row['input']} ({row['seconds']} s, {row['mb_per_s']} MB/s)")
+            else:
+                print(f"[{i}/{len(to_process)}] × {row['input']}: {row['error']}")
+    batch_seconds = time.time() - batch_start
+
+    summary_csv = summary_csv or os.path.join(date_folder, SUMMARY_CSV_NAME)
+    with open(summary_csv, mode='w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(sorted(rows, key=lambda r: r["input"]))
+
+    total_mb = sum(r["input_mb"] for r in rows if r["status"] == "done")
+    failed = sum(1 for r in rows if r["status"] != "done")
+    print(f"\nProcessed {len(rows) - failed} cube(s), {failed} failed, in {batch_seconds:.1f} s "
+          f"({total_mb / max(batch_seconds, 1e-6):.1f} MB/s overall).")
+    print(f"Summary written to {summary_csv}")
+
+
+if __name__ == "__main__":
+    date_folder_path = r"Y:\TECK_WHITE_EARTH\TECK_HYPERSPEC\0702\T1_VNIR"
+    run_veg_detector_batch(date_folder_path)
@@ -0,0 +1,348 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+MANIFEST_NAME = ".bulk_move_manifest.json"
+CHUNK_SIZE = 8 * 1024 * 1024
+DEFAULT_WORKERS = 4
+
+# How often (seconds) progress is flushed to the manifest while copies are running.
+MANIFEST_SAVE_INTERVAL = 2.0
+
+
+def file_checksum(path, chunk_size=CHUNK_SIZE):
+    """Returns the BLAKE2b hex digest of a file, read in chunks."""
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_manifest(manifest, manifest_path):
+    """Writes the manifest next to its final path and swaps it in, so a crash never leaves half a file."""
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, manifest_path)
+
+
+def load_manifest(manifest_path):
+    """Returns the saved manifest, or None if there is none (or it cannot be read)."""
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read manifest '{manifest_path}'. Reason: {e}")
+        return None
+
+
+def same_filesystem(source_path, destination_dir):
+    """
+    True when 'source_path' and the existing folder 'destination_dir' are on the same
+    volume, i.e. a move between them can be an atomic rename instead of a copy.
+    """
+    try:
+        return os.stat(source_path).st_dev == os.stat(destination_dir).st_dev
+    except OSError:
+        return False
+
+
+def plan_folder_moves(folder_pairs):
+    """
+    Builds a manifest describing every file that has to travel to move each source
+    folder to its destination. Nothing is touched on disk.
+
+    Args:
+        folder_pairs (list): (source_folder, destination_folder) tuples. The destination
+                             is the final path of the folder, not its parent.
+
+    Returns:
+        dict: Manifest with 'folders', 'dirs' and 'files' entries.
+    """
+    manifest = {"folders": [], "dirs": [], "files": []}
+    for source_folder, destination_folder in folder_pairs:
+        source_folder = os.path.normpath(source_folder)
+        destination_folder = os.path.normpath(destination_folder)
+
+        if source_folder == destination_folder:
+            print(f"-> Info: Folder '{source_folder}' is already in the destination. Skipping.")
+            continue
+        if not os.path.isdir(source_folder):
+            print(f"-> Info: Folder '{source_folder}' was already moved or deleted. Skipping.")
+            continue
+        if os.path.exists(destination_folder):
+            print(f"   -> Error: Could not move folder. A folder with the same name already exists "
+                  f"at the destination: '{destination_folder}'")
+            continue
+
+        manifest["folders"].append({"source": source_folder, "destination": destination_folder})
+        for dirpath, _, filenames in os.walk(source_folder):
+            relative = os.path.relpath(dirpath, source_folder)
+            destination_dir = os.path.normpath(os.path.join(destination_folder, relative))
+            manifest["dirs"].append(destination_dir)
+            for filename in filenames:
+                source_path = os.path.join(dirpath, filename)
+                manifest["files"].append({
+                    "source": source_path,
+                    "destination": os.path.join(destination_dir, filename),
+                    "size": os.path.getsize(source_path),
+                    "status": "pending",
+                })
+    return manifest
+
+
+def _verified_copy(source_path, destination_path, expected_size):
+    """
+    Copies a file through a '.part' file while hashing it, then re-reads the copy and
+    only swaps it into place once size and checksum both match.
+    """
+    part_path = destination_path + ".part"
+    digest = hashlib.blake2b()
+    with open(source_path, 'rb') as src, open(part_path, 'wb') as dst:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            dst.write(chunk)
+    shutil.copystat(source_path, part_path)
+
+    copied_size = os.path.getsize(part_path)
+    if copied_size != expected_size:
+        os.remove(part_path)
+        raise IOError(f"size mismatch after copy ({copied_size} != {expected_size} bytes)")
+    if file_checksum(part_path) != digest.hexdigest():
+        os.remove(part_path)
+        raise IOError("checksum mismatch after copy")
+    os.replace(part_path, destination_path)
+    return digest.hexdigest()
+
+
+def _transfer_file(entry, delete_source):
+    """Transfers one manifest entry. Returns (bytes actually copied, checksum or None)."""
+    source_path = entry["source"]
+    destination_path = entry["destination"]
+
+    if not os.path.exists(source_path):
+        if os.path.exists(destination_path) and os.path.getsize(destination_path) == entry["size"]:
+            # Interrupted after the copy was verified and the source deleted.
+            return 0, None
+        raise FileNotFoundError(f"source is missing and no complete copy exists: '{source_path}'")
+
+    if os.path.exists(destination_path) and os.path.getsize(destination_path) == entry["size"]:
+        # Interrupted between the copy and the source delete: verify instead of recopying.
+        if file_checksum(destination_path) == file_checksum(source_path):
+            if delete_source:
+                os.remove(source_path)
+            return 0, None
+
+    checksum = _verified_copy(source_path, destination_path, entry["size"])
+    if delete_source:
+        os.remove(source_path)
+    return entry["size"], checksum
+
+
+def run_manifest(manifest, manifest_path, max_workers=DEFAULT_WORKERS, delete_source=True):
+    """
+    Executes every pending file of a manifest on a bounded thread pool, saving progress
+    to 'manifest_path' as it goes so an interrupted run can be resumed.
+
+    Args:
+        manifest (dict): Manifest from plan_folder_moves() or a previous run.
+        manifest_path (str): Where progress is saved, or None to keep it in memory only.
+        max_workers (int): Number of concurrent copies.
+        delete_source (bool): Delete each source file once its copy is verified (move).
+                              When False the sources are left in place (copy).
+
+    Returns:
+        tuple: (files done, files failed, bytes copied)
+    """
+    for destination_dir in manifest["dirs"]:
+        os.makedirs(destination_dir, exist_ok=True)
+
+    pending = [e for e in manifest["files"] if e["status"] != "done"]
+    already_done = len(manifest["files"]) - len(pending)
+    if already_done:
+        print(f"Resuming: {already_done} file(s) already transferred, {len(pending)} remaining.")
+
+    last_save = time.time()
+    done_count = 0
+    failed_count = 0
+    bytes_copied = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_transfer_file, e, delete_source): e for e in pending}
+        for future in as_completed(futures):
+            entry = futures[future]
+            try:
+                copied, checksum = future.result()
+                bytes_copied += copied
+                if checksum:
+                    entry["checksum"] = checksum
+                entry["status"] = "done"
+                entry.pop("error", None)
+                done_count += 1
+                print(f"     -> Done: '{entry['source']}'")
+            except Exception as e:
+                entry["status"] = "failed"
+                entry["error"] = str(e)
+                failed_count += 1
+                print(f"     -> Error: Could not transfer '{entry['source']}'. Reason: {e}")
+
+            if manifest_path and time.time() - last_save >= MANIFEST_SAVE_INTERVAL:
+                save_manifest(manifest, manifest_path)
+                last_save = time.time()
+
+    if manifest_path:
+        save_manifest(manifest, manifest_path)
+    return done_count, failed_count, bytes_copied
+
+
+def _remove_emptied_tree(folder):
+    """Removes a source folder bottom-up once every file in it has been moved away."""
+    for dirpath, _, _ in os.walk(folder, topdown=False):
+        try:
+            os.rmdir(dirpath)
+        except OSError:
+            print(f"   -> Warning: '{dirpath}' is not empty and was left in place.")
+
+
+def _rename_same_volume_folders(folder_pairs):
+    """
+    Renames every folder whose destination is on the same volume (an atomic,
+    metadata-only operation) and returns the pairs that still need a copy.
+    """
+    remaining = []
+    for source_folder, destination_folder in folder_pairs:
+        destination_parent = os.path.dirname(os.path.normpath(destination_folder))
+        if (os.path.isdir(source_folder) and not os.path.exists(destination_folder)
+                and same_filesystem(source_folder, destination_parent)):
+            try:
+                os.rename(source_folder, destination_folder)
+                print(f"-> Renamed '{source_folder}' to '{destination_folder}' (same volume)")
+                continue
+            except OSError as e:
+                print(f"   -> Info: Rename failed, falling back to a copy. Details: {e}")
+        remaining.append((source_folder, destination_folder))
+    return remaining
+
+
+def move_folders(folder_pairs, manifest_path, max_workers=DEFAULT_WORKERS):
+    """
+    Moves whole folders. Folders whose destination is on the same volume are
+    renamed in place; the rest go through a resumable, verified transfer where
+    every file is planned into a manifest up front. If 'manifest_path' already
+    exists the previous run is resumed: pairs it already holds are not planned
+    again, new pairs are planned and added to it, and a source that the manifest
+    sends to a different destination raises a ValueError.
+
+    Args:
+        folder_pairs (list): (source_folder, destination_folder) tuples, where the
+                             destination is the final path of the moved folder.
+        manifest_path (str): Path of the JSON manifest used to track progress.
+        max_workers (int): Number of concurrent copies.
+    """
+    manifest = load_manifest(manifest_path)
+    if manifest is None:
+        folder_pairs = _rename_same_volume_folders(folder_pairs)
+        manifest = plan_folder_moves(folder_pairs)
+        if not manifest["files"] and not manifest["folders"]:
+            print("Nothing left to copy.")
+            return
+        save_manifest(manifest, manifest_path)
+        print(f"Planned {len(manifest['files'])} file(s) in {len(manifest['folders'])} folder(s). "
+              f"Manifest: '{manifest_path}'")
+    else:
+        print(f"Found an unfinished manifest at '{manifest_path}'. Resuming it.")
+        planned = {folder["source"]: folder["destination"] for folder in manifest["folders"]}
+        conflicts = [(source, destination) for source, destination in folder_pairs
+                     if planned.get(os.path.normpath(source), os.path.normpath(destination))
+                     != os.path.normpath(destination)]
+        if conflicts:
+            raise ValueError("The unfinished manifest moves these folders elsewhere; finish or delete "
+                             f"'{manifest_path}' first: " +
+                             ", ".join(f"'{s}' -> '{planned[os.path.normpath(s)]}'" for s, _ in conflicts))
+        new_pairs = [(source, destination) for source, destination in folder_pairs
+                     if os.path.normpath(source) not in planned]
+        if new_pairs:
+            added = plan_folder_moves(_rename_same_volume_folders(new_pairs))
+            if added["folders"]:
+                for key in ("folders", "dirs", "files"):
+                    manifest[key].extend(added[key])
+                save_manifest(manifest, manifest_path)
+                print(f"Added {len(added['files'])} file(s) in {len(added['folders'])} new folder(s) to the manifest.")
+
+    start = time.time()
+    done_count, failed_count, bytes_copied = run_manifest(manifest, manifest_path, max_workers)
+    elapsed = max(time.time() - start, 1e-6)
+
+    if failed_count:
+        print(f"\n{failed_count} file(s) failed. Fix the cause and run again to resume from "
+              f"'{manifest_path}'.")
+        return
+
+    for folder in manifest["folders"]:
+        if os.path.isdir(folder["source"]):
+            _remove_emptied_tree(folder["source"])
+        print(f"-> Moved '{folder['source']}' to '{folder['destination']}'")
+    os.remove(manifest_path)
+    print(f"\nTransferred {done_count} file(s), {bytes_copied / 1e6:.1f} MB copied "
+          f"({bytes_copied / 1e6 / elapsed:.1f} MB/s).")
+
+
+def move_files(file_pairs, max_workers=DEFAULT_WORKERS):
+    """
+    Moves individual files. Files whose destination folder is on the same volume
+    are moved with an atomic rename; the cross-device ones are batched together
+    and sent through the verified copy engine on a thread pool. A file whose
+    destination already exists is never overwritten: it is reported and skipped.
+
+    Args:
+        file_pairs (list): (source_path, destination_path) tuples. Destination
+                           folders are created if needed.
+        max_workers (int): Number of concurrent copies for the cross-device batch.
+
+    Returns:
+        dict: Counts of 'renamed', 'copied', 'skipped' and 'failed' files and
+              'bytes_copied', the number of bytes that actually had to travel
+              between volumes.
+    """
+    stats = {"renamed": 0, "copied": 0, "skipped": 0, "failed": 0, "bytes_copied": 0}
+    cross_device = []
+    for source_path, destination_path in file_pairs:
+        if os.path.exists(destination_path):
+            print(f"   -> Error: '{destination_path}' already exists. Skipping '{source_path}'.")
+            stats["skipped"] += 1
+            continue
+        destination_dir = os.path.dirname(destination_path)
+        os.makedirs(destination_dir, exist_ok=True)
+        if same_filesystem(source_path, destination_dir):
+            try:
+                os.replace(source_path, destination_path)
+                stats["renamed"] += 1
+                continue
+            except OSError:
+                # e.g. two shares of one server reporting the same volume id
+                pass
+        cross_device.append({
+            "source": source_path,
+            "destination": destination_path,
+            "size": os.path.getsize(source_path),
+            "status": "pending",
+        })
+
+    if cross_device:
+        print(f"   -> Copying {len(cross_device)} file(s) across volumes...")
+        manifest = {"folders": [], "dirs": [], "files": cross_device}
+        stats["copied"], stats["failed"], stats["bytes_copied"] = run_manifest(manifest, None, max_workers)
+    return stats
@@ -1,5 +1,3 @@
-import matplotlib.pyplot as plt
-
 # Absorption wavelengths (µm) for each mineral
 minerals = {
     "Biotite": [1.4, 2.2, 2.35],
@@ -25,26 +23,33 @@ wavelengths_nm = [wl * 1000 for wls in minerals.values() for wl in wls]
 vnir_range = (398.42, 1001.57)
 swir_range = (891.28, 2505.39)
 
-# Plot histogram
-fig, ax = plt.subplots()
-counts, bins, patches = ax.hist(wavelengths_nm, bins=150)
 
-# Draw vertical lines for VNIR and SWIR extents
-ax.axvline(vnir_range[0], linestyle='--')
-ax.axvline(vnir_range[1], linestyle='--')
-ax.axvline(swir_range[0], linestyle='--')
-ax.axvline(swir_range[1], linestyle='--')
+def plot_absorption_histogram():
+    """Histogram of the mineral absorption wavelengths against the VNIR and SWIR sensor ranges."""
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    counts, bins, patches = ax.hist(wavelengths_nm, bins=150)
+
+    # Draw vertical lines for VNIR and SWIR extents
+    ax.axvline(vnir_range[0], linestyle='--')
+    ax.axvline(vnir_range[1], linestyle='--')
+    ax.axvline(swir_range[0], linestyle='--')
+    ax.axvline(swir_range[1], linestyle='--')
+
+    # Annotate regions
+    ymax = max(counts) * 1.05
+    ax.set_ylim(0, ymax)
+    ax.text((vnir_range[0] + vnir_range[1]) / 2, ymax * 0.9, "VNIR", ha='center', va='center')
+    ax.text((swir_range[0] + swir_range[1]) / 2, ymax * 0.9, "SWIR", ha='center', va='center')
 
-# Annotate regions
-ymax = max(counts) * 1.05
-ax.set_ylim(0, ymax)
-ax.text((vnir_range[0] + vnir_range[1]) / 2, ymax * 0.9, "VNIR", ha='center', va='center')
-ax.text((swir_range[0] + swir_range[1]) / 2, ymax * 0.9, "SWIR", ha='center', va='center')
+    # Labels
+    ax.set_xlabel("Wavelength (nm)")
+    ax.set_ylabel("Count (# wavelengths per bin)")
+    ax.set_title("Histogram of Mineral Absorption Wavelengths")
 
-# Labels
-ax.set_xlabel("Wavelength (nm)")
-ax.set_ylabel("Count (# wavelengths per bin)")
-ax.set_title("Histogram of Mineral Absorption Wavelengths")
+    plt.show()
 
-plt.show()
 
+if __name__ == "__main__":
+    plot_absorption_histogram()
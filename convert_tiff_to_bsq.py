@@ -1,18 +1,179 @@
 import os
-from qgis.core import QgsApplication
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
 from osgeo import gdal
 
-# Input TIFF file path (update this if needed)
-input_tiff = r"D:\question mark\convert\sept_15_aurora_3_new_09_VNIR_1800_SN0933_raw_rad_bsq_float32_atm_polish_geo.tiff"
+import envi_header
+
+INTERLEAVES = ('bsq', 'bil', 'bip')
+
+# Lines read per chunk; memory per chunk is lines x samples x bands x itemsize.
+DEFAULT_CHUNK_LINES = 256
+
+# Reflectance 0..1 stored as int16 0..10000 (the usual ENVI convention).
+INT16_SCALE_FACTOR = 10000
+INT16_NODATA = -32768
+FLOAT_TYPES = (gdal.GDT_Float32, gdal.GDT_Float64)
+
+# Header fields carried over from the source cube's own .hdr when GDAL did not write them.
+CARRIED_HEADER_FIELDS = ('wavelength', 'wavelength units', 'fwhm', 'acquisition time')
+
+
+def _scale_to_int16(array, scale_factor, nodata=None):
+    """
+    Scales float reflectance to int16; NaN/inf pixels and pixels equal to the source
+    nodata value (a scalar, or one value per band of a (bands, lines, samples) array,
+    NaN where a band has none) become INT16_NODATA.
+    """
+    invalid = ~np.isfinite(array)
+    if nodata is not None:
+        invalid |= array == nodata
+    scaled = np.clip(np.rint(array.astype(np.float32) * scale_factor), INT16_NODATA + 1, 32767)
+    scaled[invalid] = INT16_NODATA
+    return scaled.astype(np.int16)
+
+
+def _append_header_fields(hdr_path, extra_fields):
+    """Appends 'key = value' lines to an ENVI header, skipping keys it already has."""
+    existing = envi_header.read_envi_header(hdr_path)
+    lines = []
+    for key, value in extra_fields.items():
+        if key not in existing:
+            lines.append(f"{key} = {value}\n")
+    if lines:
+        with open(hdr_path, 'a') as f:
+            f.writelines(lines)
+
+
+def convert_to_envi(input_tiff, output_path=None, interleave='bsq', scale_to_int16=False,
+                    scale_factor=INT16_SCALE_FACTOR, chunk_lines=DEFAULT_CHUNK_LINES):
+    """
+    Streams a (hyperspectral) TIFF into an ENVI binary + .hdr without ever holding
+    the whole cube in memory. Each chunk of lines is read once with all bands and
+    written to every band of the output, whatever its interleave.
+
+    Args:
+        input_tiff (str): Source raster.
+        output_path (str): Defaults to the input path with '.bsq', '.bil' or '.bip'.
+        interleave (str): 'bsq', 'bil' or 'bip'.
+        scale_to_int16 (bool): Store float reflectance as int16 (x scale_factor) and
+                               record 'reflectance scale factor' in the header.
+                               Halves the size of float32 cubes. Integer sources
+                               (e.g. uint16 DN) are already compact and are
+                               copied unchanged in their own data type.
+        scale_factor (float): Multiplier used for the int16 output.
+        chunk_lines (int): Number of lines per read/write.
+
+    Returns:
+        str: Path of the written ENVI file.
+    """
+    interleave = interleave.lower()
+    if interleave not in INTERLEAVES:
+        raise ValueError(f"interleave must be one of {INTERLEAVES}, got '{interleave}'")
+
+    gdal.UseExceptions()
+    src = gdal.Open(input_tiff, gdal.GA_ReadOnly)
+    xsize, ysize, n_bands = src.RasterXSize, src.RasterYSize, src.RasterCount
+
+    if output_path is None:
+        output_path = os.path.splitext(input_tiff)[0] + '.' + interleave
+    src_type = src.GetRasterBand(1).DataType
+    if scale_to_int16 and src_type not in FLOAT_TYPES:
+        print(f"{os.path.basename(input_tiff)} is {gdal.GetDataTypeName(src_type)}, not float reflectance: "
+              f"copied without int16 scaling")
+        scale_to_int16 = False
+    data_type = gdal.GDT_Int16 if scale_to_int16 else src_type
+
+    # Read the source's own header first: 'cube.tif' and 'cube.bsq' share 'cube.hdr',
+    # which the ENVI driver is about to overwrite.
+    extra_fields = {}
+    src_hdr = envi_header.find_header(input_tiff)
+    if src_hdr:
+        src_fields = envi_header.read_envi_header(src_hdr)
+        for key in CARRIED_HEADER_FIELDS:
+            if key in src_fields:
+                extra_fields[key] = '{' + src_fields[key] + '}' if ',' in src_fields[key] else src_fields[key]
+
+    driver = gdal.GetDriverByName('ENVI')
+    dst = driver.Create(output_path, xsize, ysize, n_bands, data_type,
+                        options=[f'INTERLEAVE={interleave.upper()}'])
+    dst.SetGeoTransform(src.GetGeoTransform())
+    dst.SetProjection(src.GetProjection())
+    for b in range(1, n_bands + 1):
+        src_band, dst_band = src.GetRasterBand(b), dst.GetRasterBand(b)
+        if src_band.GetDescription():
+            dst_band.SetDescription(src_band.GetDescription())
+        if scale_to_int16:
+            dst_band.SetNoDataValue(INT16_NODATA)
+        elif src_band.GetNoDataValue() is not None:
+            dst_band.SetNoDataValue(src_band.GetNoDataValue())
+
+    # Source nodata per band, shaped to broadcast over a (bands, lines, samples) chunk
+    nodata = np.array([np.nan if v is None else v for v in
+                       (src.GetRasterBand(b).GetNoDataValue() for b in range(1, n_bands + 1))])[:, None, None]
+
+    # One read per chunk of lines (all bands, so a pixel-interleaved TIFF is read
+    # once); GDAL writes each band plane of the chunk to its place in the file.
+    for yoff in range(0, ysize, chunk_lines):
+        rows = min(chunk_lines, ysize - yoff)
+        chunk = src.ReadAsArray(0, yoff, xsize, rows)
+        if n_bands == 1:
+            chunk = chunk[np.newaxis]
+        if scale_to_int16:
+            chunk = _scale_to_int16(chunk, scale_factor, nodata)
+        dst.WriteArray(chunk, 0, yoff)
+
+    dst.FlushCache()
+    dst = None
+
+    hdr_path = os.path.splitext(output_path)[0] + '.hdr'
+    if scale_to_int16:
+        extra_fields['reflectance scale factor'] = f"{scale_factor:g}"
+    if extra_fields and os.path.exists(hdr_path):
+        _append_header_fields(hdr_path, extra_fields)
+
+    src = None
+    return output_path
+
+
+def _convert_one(input_tiff, interleave, scale_to_int16):
+    start = time.time()
+    output_path = convert_to_envi(input_tiff, interleave=interleave, scale_to_int16=scale_to_int16)
+    return output_path, time.time() - start
+
+
+def convert_folder(input_folder, interleave='bsq', scale_to_int16=False, max_workers=None):
+    """
+    Converts every .tif/.tiff directly inside input_folder to ENVI in parallel,
+    one worker process per file.
+    """
+    if not os.path.isdir(input_folder):
+        print(f"Error: Input folder not found at '{input_folder}'")
+        return
+
+    tiffs = [os.path.join(input_folder, f) for f in sorted(os.listdir(input_folder))
+             if f.lower().endswith(('.tif', '.tiff'))]
+    if not tiffs:
+        print(f"No TIFF files found in '{input_folder}'.")
+        return
+
+    print(f"Converting {len(tiffs)} file(s) to {interleave.upper()}"
+          f"{' (int16 scaled)' if scale_to_int16 else ''}...")
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_convert_one, t, interleave, scale_to_int16): t for t in tiffs}
+        for future in as_completed(futures):
+            try:
+                output_path, seconds = future.result()
+                print(f"✓ {output_path} ({seconds:.1f} s)")
+            except Exception as e:
+                print(f"× Failed to convert {futures[future]}: {e}")
 
-# Output BSQ path (change as needed)
-output_bsq = os.path.splitext(input_tiff)[0] + ".bsq"
 
-# GDAL translation to ENVI format (BSQ interleave by default)
-gdal.Translate(
-    output_bsq,
-    input_tiff,
-    format='ENVI'
-)
+if __name__ == "__main__":
+    # Input TIFF file path (update this if needed)
+    input_tiff = r"D:\question mark\convert\sept_15_aurora_3_new_09_VNIR_1800_SN0933_raw_rad_bsq_float32_atm_polish_geo.tiff"
 
-print(f"Conversion complete.\nOutput file: {output_bsq}")
\ No newline at end of file
+    output_path = convert_to_envi(input_tiff, interleave='bsq')
+    print(f"Conversion complete.\nOutput file: {output_path}")
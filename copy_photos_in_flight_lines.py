@@ -0,0 +1,108 @@
+import os
+import csv
+import json
+import hashlib
+
+import pandas as pd
+
+import bulk_mover
+
+
+def reconcile(input_folder, csv_file_path, skiprows=6, column='Filename'):
+    """
+    Compares the files of input_folder with the file names listed in a CSV using
+    hashed sets.
+
+    Returns:
+        tuple: (matching, missing, extra, sizes) where matching keeps the CSV order,
+               missing are CSV names not in the folder, extra are folder files not in
+               the CSV, and sizes maps every folder file name to its size in bytes.
+    """
+    with os.scandir(input_folder) as entries:
+        sizes = {e.name: e.stat().st_size for e in entries if e.is_file()}
+
+    df_csv = pd.read_csv(csv_file_path, skiprows=skiprows)
+    df_csv.columns = df_csv.columns.str.strip()
+    file_names_from_csv = df_csv[column].dropna().astype(str).str.strip().tolist()
+    wanted = set(file_names_from_csv)
+
+    # dict.fromkeys drops duplicate CSV rows but keeps their order
+    matching = [f for f in dict.fromkeys(file_names_from_csv) if f in sizes]
+    missing = sorted(wanted - sizes.keys())
+    extra = sorted(sizes.keys() - wanted)
+    return matching, missing, extra, sizes
+
+
+def _write_list(path, header, names):
+    with open(path, mode='w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['Index', header])
+        writer.writerows(enumerate(names, 1))
+
+
+def inputs_fingerprint(input_folder, matching, sizes):
+    """BLAKE2b digest of the source folder and the (name, size) of every file to copy."""
+    key = [os.path.normcase(os.path.abspath(input_folder)), [(name, sizes[name]) for name in matching]]
+    return hashlib.blake2b(json.dumps(key).encode('utf-8')).hexdigest()
+
+
+def copy_photos_in_flight_lines(input_folder, output_folder, csv_file_path, skiprows=6,
+                                max_workers=bulk_mover.DEFAULT_WORKERS):
+    """
+    Copies the photos listed in a CSV (e.g. the frames inside the flight lines) from
+    input_folder to output_folder and reports which listed photos are missing from
+    the folder and which folder files are not listed.
+
+    The copy is concurrent and checksum-verified, preserves file metadata, and is
+    resumable: progress is kept in a manifest in output_folder, so rerunning after
+    an interruption only copies what is left. The manifest records a fingerprint of
+    the inputs (source folder, listed files and their sizes); if they changed since,
+    e.g. another CSV or folder, the manifest is rebuilt rather than resumed.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    matching, missing, extra, sizes = reconcile(input_folder, csv_file_path, skiprows)
+
+    print(f"{len(matching)} listed file(s) found, {len(missing)} missing from the folder, "
+          f"{len(extra)} folder file(s) not listed.")
+    _write_list(os.path.join(output_folder, 'matching_file_list.csv'), 'File Name', matching)
+    _write_list(os.path.join(output_folder, 'missing_file_list.csv'), 'File Name', missing)
+    _write_list(os.path.join(output_folder, 'extra_file_list.csv'), 'File Name', extra)
+    print(f"File lists have been exported to {output_folder}.")
+
+    manifest_path = os.path.join(output_folder, bulk_mover.MANIFEST_NAME)
+    fingerprint = inputs_fingerprint(input_folder, matching, sizes)
+    manifest = bulk_mover.load_manifest(manifest_path)
+    if manifest is not None and manifest.get("inputs") != fingerprint:
+        print(f"The inputs changed since '{manifest_path}' was written; starting a new copy plan.")
+        manifest = None
+    if manifest is None:
+        manifest = {"inputs": fingerprint, "folders": [], "dirs": [output_folder], "files": [
+            {
+                "source": os.path.join(input_folder, name),
+                "destination": os.path.join(output_folder, name),
+                "size": sizes[name],
+                "status": "pending",
+            }
+            for name in matching
+        ]}
+        bulk_mover.save_manifest(manifest, manifest_path)
+
+    done, failed, bytes_copied = bulk_mover.run_manifest(manifest, manifest_path, max_workers,
+                                                         delete_source=False)
+    print(f"\nCopied {done} file(s) ({bytes_copied / 1e9:.2f} GB), {failed} failed.")
+    if failed == 0:
+        os.remove(manifest_path)
+        print(f"Matching files have been copied to {output_folder}.")
+    else:
+        print(f"Rerun to retry the failed file(s); progress is kept in '{manifest_path}'.")
+
+
+if __name__ == "__main__":
+    # Specify the folder locations
+    input_folder = r"E:\LM2403-66 Dahrouge EGNC\RAW DATA- LiDAR and Ortho\Corvet\2024.06.24. Corvet flight 1, VUX240, IMU32, Phase one IXM 100, Baie-James, QC\Rover\20240624-214610\cam0"
+    output_folder = r"C:\Users\olivi\Desktop\PhaseOne IXM-100 photos\Corvet_sample_data_pof"
+
+    # Path to the CSV file containing file names
+    csv_file_path = r"C:\Users\olivi\Desktop\PhaseOne IXM-100 photos\corvet_sample_photos.csv"
+
+    copy_photos_in_flight_lines(input_folder, output_folder, csv_file_path)
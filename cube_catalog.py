@@ -0,0 +1,176 @@
+import os
+import json
+import sqlite3
+import datetime
+
+import envi_header
+import nas_index
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.expanduser("~"), ".rosor", "cube_catalog.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS headers (
+    path             TEXT PRIMARY KEY,
+    folder           TEXT NOT NULL,
+    size             INTEGER,
+    mtime            REAL,
+    samples          INTEGER,
+    lines            INTEGER,
+    bands            INTEGER,
+    interleave       TEXT,
+    data_type        INTEGER,
+    acquisition_time REAL,
+    wavelength_min   REAL,
+    wavelength_max   REAL,
+    wavelengths      TEXT,
+    map_info         TEXT
+);
+CREATE INDEX IF NOT EXISTS headers_folder ON headers(folder);
+"""
+
+
+def open_catalog(db_path=DEFAULT_CATALOG_PATH):
+    """Opens (and creates, if needed) the cube metadata catalog."""
+    folder = os.path.dirname(db_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _store_header(conn, hdr_path, size, mtime):
+    fields = envi_header.parse_envi_header(hdr_path)
+    wavelengths = fields.get('wavelength') or []
+    acquired = fields.get('acquisition time')
+    conn.execute(
+        "INSERT OR REPLACE INTO headers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            hdr_path, os.path.dirname(hdr_path), size, mtime,
+            fields.get('samples'), fields.get('lines'), fields.get('bands'),
+            fields.get('interleave'), fields.get('data type'),
+            acquired.timestamp() if acquired else None,
+            min(wavelengths) if wavelengths else None,
+            max(wavelengths) if wavelengths else None,
+            json.dumps(wavelengths) if wavelengths else None,
+            json.dumps(fields['map info']) if 'map info' in fields else None,
+        ),
+    )
+
+
+def refresh_catalog(conn, folder, index=None):
+    """
+    Makes sure every .hdr under 'folder' is in the catalog. A header is only opened
+    and parsed when its (size, mtime) differs from the catalogued one. When an open
+    nas_index connection is given, the folders are listed from the directory index
+    instead of being walked on the share. Each header is still stat'ed (one cheap
+    call): the index only notices a changed directory, not a .hdr rewritten in place.
+
+    Args:
+        conn (sqlite3.Connection): Connection returned by open_catalog().
+        folder (str): Folder searched recursively for .hdr files.
+        index (sqlite3.Connection): Optional, already refreshed nas_index connection.
+
+    Returns:
+        int: Number of headers (re)parsed.
+    """
+    folder = os.path.normpath(folder)
+    known = {}
+    prefix = folder.rstrip(os.sep) + os.sep
+    for path, size, mtime in conn.execute(
+            "SELECT path, size, mtime FROM headers WHERE folder = ? OR (folder >= ? AND folder < ?)",
+            (folder, prefix, prefix[:-1] + chr(ord(os.sep) + 1))):
+        known[path] = (size, mtime)
+
+    seen = set()
+    parsed = 0
+    if index is not None:
+        walker = ((dirpath, nas_index.list_files(index, dirpath)) for dirpath, _, _ in nas_index.walk_index(index, folder))
+    else:
+        walker = ((dirpath, filenames) for dirpath, _, filenames in os.walk(folder))
+
+    for dirpath, files in walker:
+        for filename in files:
+            if not filename.lower().endswith('.hdr'):
+                continue
+            hdr_path = os.path.join(dirpath, filename)
+            try:
+                st = os.stat(hdr_path)
+            except FileNotFoundError:
+                continue
+            stat = (st.st_size, st.st_mtime)
+            seen.add(hdr_path)
+            if known.get(hdr_path) == tuple(stat):
+                continue
+            try:
+                _store_header(conn, hdr_path, *stat)
+                parsed += 1
+            except (OSError, ValueError) as e:
+                print(f"Error reading {hdr_path}: {e}")
+
+    gone = [p for p in known if p not in seen]
+    conn.executemany("DELETE FROM headers WHERE path = ?", [(p,) for p in gone])
+    conn.commit()
+    return parsed
+
+
+def get_header(conn, hdr_path):
+    """
+    Returns the catalogued metadata of one header as a dict, re-parsing it only if
+    it changed on disk since it was catalogued.
+    """
+    hdr_path = os.path.normpath(hdr_path)
+    st = os.stat(hdr_path)
+    row = conn.execute("SELECT size, mtime FROM headers WHERE path = ?", (hdr_path,)).fetchone()
+    if row is None or tuple(row) != (st.st_size, st.st_mtime):
+        _store_header(conn, hdr_path, st.st_size, st.st_mtime)
+        conn.commit()
+    cursor = conn.execute("SELECT * FROM headers WHERE path = ?", (hdr_path,))
+    columns = [c[0] for c in cursor.description]
+    record = dict(zip(columns, cursor.fetchone()))
+    if record['acquisition_time'] is not None:
+        record['acquisition_time'] = datetime.datetime.fromtimestamp(record['acquisition_time'],
+                                                                     datetime.timezone.utc)
+    record['wavelengths'] = json.loads(record['wavelengths']) if record['wavelengths'] else []
+    record['map_info'] = json.loads(record['map_info']) if record['map_info'] else None
+    return record
+
+
+def folder_summary(conn, folder):
+    """
+    Aggregates every catalogued cube under 'folder' (e.g. one flight) with a single
+    query: cube count, first/last acquisition time, total pixels and band counts.
+    Call refresh_catalog() first if the folder may have changed.
+    """
+    folder = os.path.normpath(folder)
+    prefix = folder.rstrip(os.sep) + os.sep
+    row = conn.execute(
+        """SELECT COUNT(*), MIN(acquisition_time), MAX(acquisition_time),
+                  SUM(CAST(samples AS INTEGER) * lines), MIN(bands), MAX(bands)
+           FROM headers WHERE folder = ? OR (folder >= ? AND folder < ?)""",
+        (folder, prefix, prefix[:-1] + chr(ord(os.sep) + 1)),
+    ).fetchone()
+    count, first, last, pixels, min_bands, max_bands = row
+
+    def to_dt(ts):
+        return datetime.datetime.fromtimestamp(ts, datetime.timezone.utc) if ts is not None else None
+
+    return {
+        "cubes": count,
+        "first_acquisition": to_dt(first),
+        "last_acquisition": to_dt(last),
+        "time_span_seconds": (last - first) if first is not None and last is not None else None,
+        "total_pixels": pixels or 0,
+        "min_bands": min_bands,
+        "max_bands": max_bands,
+    }
+
+
+if __name__ == "__main__":
+    flight_folder = r"Y:\TECK_WHITE_EARTH\TECK_HYPERSPEC\0628\T7_VNIR\TECK_T7_F15_reflight_2025_06_28_22_38_46_698"
+
+    catalog = open_catalog()
+    print(f"Parsed {refresh_catalog(catalog, flight_folder)} new or changed header(s).")
+    for key, value in folder_summary(catalog, flight_folder).items():
+        print(f"{key}: {value}")
+    catalog.close()
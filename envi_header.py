@@ -0,0 +1,151 @@
+import os
+import datetime
+
+
+def find_header(cube_path):
+    """
+    Returns the ENVI header that belongs to a cube ('raw_1.hdr' or 'raw_1.tif.hdr'
+    next to 'raw_1.tif'), or None if there is none.
+    """
+    if cube_path.lower().endswith('.hdr'):
+        return cube_path
+    for candidate in (os.path.splitext(cube_path)[0] + '.hdr', cube_path + '.hdr'):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def read_envi_header(hdr_path):
+    """
+    Reads an ENVI .hdr file into a dict of lower-cased keys to raw string values.
+    Values in braces may span several lines; the braces are stripped.
+
+    Args:
+        hdr_path (str): Path to the .hdr file.
+
+    Returns:
+        dict: e.g. {'samples': '1600', 'wavelength': '398.42, 400.64, ...'}
+    """
+    with open(hdr_path, 'r', errors='ignore') as f:
+        text = f.read()
+
+    fields = {}
+    key = None
+    value_lines = []
+    for line in text.splitlines():
+        if key is not None:
+            # Still inside a multi-line {...} value
+            value_lines.append(line)
+            if '}' in line:
+                fields[key] = _strip_braces('\n'.join(value_lines))
+                key = None
+            continue
+
+        if '=' not in line:
+            continue
+        name, value = line.split('=', 1)
+        name = name.strip().lower()
+        value = value.strip()
+        if value.startswith('{') and '}' not in value:
+            key = name
+            value_lines = [value]
+        else:
+            fields[name] = _strip_braces(value)
+
+    if key is not None:
+        # Unterminated brace: keep what was read rather than dropping the field
+        fields[key] = _strip_braces('\n'.join(value_lines))
+    return fields
+
+
+def _strip_braces(value):
+    value = value.strip()
+    if value.startswith('{'):
+        value = value[1:]
+    if value.endswith('}'):
+        value = value[:-1]
+    return value.strip()
+
+
+def parse_list(value, cast=float):
+    """Splits a comma-separated header value ('{1.0, 2.0}') into a list."""
+    return [cast(item.strip()) for item in value.split(',') if item.strip()]
+
+
+def read_wavelengths(hdr_path):
+    """
+    Returns the band-centre wavelengths of a cube in nanometres, or None if the
+    header has no 'wavelength' field. Micrometre headers are converted.
+    """
+    return parse_envi_header(hdr_path).get('wavelength')
+
+
+def parse_acquisition_time(value):
+    """Parses an ENVI 'acquisition time' (e.g. '2025-07-02T17:38:03.042Z') as a UTC datetime."""
+    ts = value.strip().rstrip('Zz')
+    for fmt in ("%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return datetime.datetime.strptime(ts, fmt).replace(tzinfo=datetime.timezone.utc)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_map_info(value):
+    """
+    Splits an ENVI 'map info' value into its named parts, e.g.
+    '{UTM, 1, 1, 500000.0, 5500000.0, 0.5, 0.5, 11, North, WGS-84, units=Meters}'.
+    """
+    parts = [p.strip() for p in value.split(',')]
+    info = {"projection": parts[0]} if parts else {}
+    numeric_keys = ("reference_x", "reference_y", "easting", "northing", "pixel_size_x", "pixel_size_y")
+    for key, raw in zip(numeric_keys, parts[1:7]):
+        try:
+            info[key] = float(raw)
+        except ValueError:
+            break
+    rest = parts[7:]
+    if info.get("projection", "").upper() == "UTM" and len(rest) >= 2:
+        info["zone"] = rest[0]
+        info["hemisphere"] = rest[1]
+        rest = rest[2:]
+    for item in rest:
+        if '=' in item:
+            k, v = item.split('=', 1)
+            info[k.strip().lower()] = v.strip()
+        elif item and "datum" not in info:
+            info["datum"] = item
+    return info
+
+
+def parse_envi_header(hdr_path):
+    """
+    Reads an ENVI header and converts the fields we rely on to Python types:
+    samples/lines/bands/data type/header offset (int), wavelength (list of nm),
+    map info (dict) and acquisition time (UTC datetime). Every other field is
+    kept as its raw string.
+
+    Args:
+        hdr_path (str): Path to the .hdr file.
+
+    Returns:
+        dict: The header fields, keyed by lower-cased ENVI field name.
+    """
+    fields = read_envi_header(hdr_path)
+    for key in ('samples', 'lines', 'bands', 'data type', 'header offset', 'byte order'):
+        if key in fields:
+            try:
+                fields[key] = int(fields[key])
+            except ValueError:
+                pass
+    if 'wavelength' in fields:
+        wavelengths = parse_list(fields['wavelength'])
+        units = fields.get('wavelength units', '').lower()
+        if units.startswith('micro') or units == 'um' or (not units and wavelengths and max(wavelengths) < 10):
+            wavelengths = [wl * 1000.0 for wl in wavelengths]
+        fields['wavelength'] = wavelengths
+    if 'map info' in fields:
+        fields['map info'] = parse_map_info(fields['map info'])
+    if 'acquisition time' in fields:
+        fields['acquisition time'] = parse_acquisition_time(fields['acquisition time'])
+    return fields
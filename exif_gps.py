@@ -0,0 +1,211 @@
+import os
+import struct
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".rosor", "exif_gps_cache.sqlite")
+
+# Enough threads to overlap NAS round trips; the work itself is a few small reads per file.
+DEFAULT_WORKERS = 16
+
+GPS_IFD_TAG = 0x8825
+GPS_TAGS = {1: 'GPSLatitudeRef', 2: 'GPSLatitude', 3: 'GPSLongitudeRef', 4: 'GPSLongitude',
+            5: 'GPSAltitudeRef', 6: 'GPSAltitude'}
+
+# TIFF field type -> (struct code, size in bytes); IFD (13) and IFD8 (18) offsets read as LONG / LONG8
+FIELD_TYPES = {1: ('B', 1), 2: ('s', 1), 3: ('H', 2), 4: ('I', 4), 5: ('II', 8),
+               7: ('B', 1), 9: ('i', 4), 10: ('ii', 8), 13: ('I', 4), 16: ('Q', 8), 18: ('Q', 8)}
+
+
+class _TiffReader:
+    """Reads IFD entries of a TIFF stream (a .tif file or the Exif block of a JPEG) by seeking."""
+
+    def __init__(self, f, base):
+        self.f = f
+        self.base = base
+        f.seek(base)
+        header = f.read(16)
+        if header[:2] == b'II':
+            self.endian = '<'
+        elif header[:2] == b'MM':
+            self.endian = '>'
+        else:
+            raise ValueError("not a TIFF header")
+        magic = struct.unpack(self.endian + 'H', header[2:4])[0]
+        if magic == 42:
+            self.big = False
+            self.first_ifd = struct.unpack(self.endian + 'I', header[4:8])[0]
+        elif magic == 43:
+            self.big = True
+            self.first_ifd = struct.unpack(self.endian + 'Q', header[8:16])[0]
+        else:
+            raise ValueError("not a TIFF header")
+
+    def read(self, offset, size):
+        self.f.seek(self.base + offset)
+        return self.f.read(size)
+
+    def entries(self, ifd_offset):
+        """Returns {tag: (type, count, raw value-or-offset bytes)} of one IFD."""
+        count_fmt, entry_size = ('Q', 20) if self.big else ('H', 12)
+        count_size = struct.calcsize(count_fmt)
+        count = struct.unpack(self.endian + count_fmt, self.read(ifd_offset, count_size))[0]
+        data = self.read(ifd_offset + count_size, count * entry_size)
+        result = {}
+        for i in range(count):
+            entry = data[i * entry_size:(i + 1) * entry_size]
+            if self.big:
+                tag, field_type, n = struct.unpack(self.endian + 'HHQ', entry[:12])
+                raw = entry[12:20]
+            else:
+                tag, field_type, n = struct.unpack(self.endian + 'HHI', entry[:8])
+                raw = entry[8:12]
+            result[tag] = (field_type, n, raw)
+        return result
+
+    def value(self, field_type, n, raw):
+        """Decodes an entry's value, reading it from its offset if it is not inline."""
+        code, size = FIELD_TYPES[field_type]
+        total = size * n
+        if total > len(raw):
+            offset = struct.unpack(self.endian + ('Q' if self.big else 'I'), raw)[0]
+            raw = self.read(offset, total)
+        if field_type == 2:
+            return raw[:total].split(b'\0', 1)[0].decode('ascii', errors='ignore')
+        values = struct.unpack(self.endian + code * n, raw[:total])
+        if field_type in (5, 10):
+            return [num / den if den else 0.0 for num, den in zip(values[::2], values[1::2])]
+        return list(values)
+
+
+def _find_jpeg_exif(f):
+    """Returns the file offset of the TIFF block inside a JPEG's APP1 Exif segment, or None."""
+    f.seek(2)
+    while True:
+        marker = f.read(4)
+        if len(marker) < 4 or marker[0] != 0xFF:
+            return None
+        kind, length = marker[1], struct.unpack('>H', marker[2:4])[0]
+        if kind in (0xDA, 0xD9):  # start of scan / end of image: no Exif before pixel data
+            return None
+        segment_start = f.tell()
+        if kind == 0xE1 and f.read(6) == b'Exif\0\0':
+            return f.tell()
+        # The length includes its own two bytes
+        f.seek(segment_start + length - 2)
+
+
+def _to_degrees(dms):
+    d, m, s = dms
+    return d + (m / 60.0) + (s / 3600.0)
+
+
+def read_gps(image_path):
+    """
+    Reads the GPS position of a TIFF or JPEG from its IFDs only (a few small reads,
+    the pixel data is never touched).
+
+    Returns:
+        tuple: (latitude, longitude, altitude) in decimal degrees / metres, with None
+               for missing values, or None if the file has no GPS IFD.
+    """
+    with open(image_path, 'rb') as f:
+        start = f.read(2)
+        if start == b'\xff\xd8':
+            base = _find_jpeg_exif(f)
+            if base is None:
+                return None
+        else:
+            base = 0
+        reader = _TiffReader(f, base)
+
+        ifd0 = reader.entries(reader.first_ifd)
+        if GPS_IFD_TAG not in ifd0:
+            return None
+        gps_offset = reader.value(*ifd0[GPS_IFD_TAG])[0]
+        gps = {GPS_TAGS[tag]: reader.value(*entry)
+               for tag, entry in reader.entries(gps_offset).items()
+               if tag in GPS_TAGS and entry[0] in FIELD_TYPES}
+
+    lat = lon = alt = None
+    if gps.get('GPSLatitude') and gps.get('GPSLatitudeRef'):
+        lat = _to_degrees(gps['GPSLatitude'])
+        if gps['GPSLatitudeRef'] != 'N':
+            lat = -lat
+    if gps.get('GPSLongitude') and gps.get('GPSLongitudeRef'):
+        lon = _to_degrees(gps['GPSLongitude'])
+        if gps['GPSLongitudeRef'] != 'E':
+            lon = -lon
+    if gps.get('GPSAltitude'):
+        alt = gps['GPSAltitude'][0]
+        if gps.get('GPSAltitudeRef') and gps['GPSAltitudeRef'][0] == 1:
+            alt = -alt
+    return lat, lon, alt
+
+
+def open_cache(db_path=DEFAULT_CACHE_PATH):
+    """Opens (and creates, if needed) the local cache of photo GPS positions."""
+    folder = os.path.dirname(db_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("""CREATE TABLE IF NOT EXISTS photo_gps (
+                        path  TEXT PRIMARY KEY,
+                        size  INTEGER,
+                        mtime REAL,
+                        lat   REAL,
+                        lon   REAL,
+                        alt   REAL)""")
+    return conn
+
+
+def _stat_and_read(image_path, cached):
+    """
+    Returns (stat, position, failed). stat is (size, mtime) when the result should
+    be cached and None for cache hits and read errors, so a photo that could not be
+    read is retried next time instead of being cached as "no GPS".
+    """
+    try:
+        st = os.stat(image_path)
+        if cached is not None and cached[:2] == (st.st_size, st.st_mtime):
+            return None, cached[2:], False
+        position = read_gps(image_path)
+    except (OSError, ValueError, KeyError, struct.error) as e:
+        print(f"Error reading EXIF of {image_path}: {e}")
+        return None, (None, None, None), True
+    return (st.st_size, st.st_mtime), position or (None, None, None), False
+
+
+def read_gps_batch(image_paths, max_workers=DEFAULT_WORKERS, cache_path=DEFAULT_CACHE_PATH):
+    """
+    Reads the GPS positions of many photos across a thread pool. Results are cached
+    per file by size and mtime, so unchanged photos are only stat'ed on a rerun.
+
+    Args:
+        image_paths (list): Photo paths.
+        max_workers (int): Threads used to overlap NAS latency.
+        cache_path (str): SQLite cache location.
+
+    Returns:
+        list: One (latitude, longitude, altitude) tuple per path, in order; values
+              are None where the photo has no GPS data.
+    """
+    conn = open_cache(cache_path)
+    paths = [os.path.normpath(p) for p in image_paths]
+    cached = {row[0]: tuple(row[1:]) for row in conn.execute("SELECT * FROM photo_gps")}
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        updates = []
+        failed = 0
+        for path, (stat, position, error) in zip(paths, pool.map(lambda p: _stat_and_read(p, cached.get(p)), paths)):
+            results.append(tuple(position))
+            failed += error
+            if stat is not None:
+                updates.append((path, *stat, *position))
+    conn.executemany("INSERT OR REPLACE INTO photo_gps VALUES (?, ?, ?, ?, ?, ?)", updates)
+    conn.commit()
+    conn.close()
+    print(f"Read GPS of {len(updates)} photo(s); {len(paths) - len(updates) - failed} taken from the cache, "
+          f"{failed} could not be read.")
+    return results
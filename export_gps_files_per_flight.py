@@ -1,7 +1,93 @@
 import os
-import pandas as pd
+import re
+from bisect import bisect_left, bisect_right
 import shutil
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import imu_gps
+
+
+# Trimble receivers name logs '<serial><YYYYMMDDHHMM>.T04', the serial digits
+# written directly before the timestamp, so the timestamp is the last 12 digits;
+# older exports only keep the HHMM at the end of the name.
+T04_FULL_TIME_PATTERN = re.compile(r"(\d{12})\.T04$", re.IGNORECASE)
+T04_HHMM_PATTERN = re.compile(r"(\d{4})\.T04$", re.IGNORECASE)
+
+
+def build_t04_catalog(gps_source_path):
+    """
+    Lists the .T04 files of the central GPS folder once.
+
+    Files named with a full YYYYMMDDHHMM are returned sorted by their UTC start
+    time. Names with only a trailing HHMM carry no date (the file modification
+    time is a copy date, not an acquisition date), so they are returned apart
+    with their time of day, and dated per flight by select_t04_ranges().
+
+    Returns:
+        tuple: (names, times, hhmm_files) where times is the sorted list of start
+               datetimes of names, and hhmm_files a list of (time of day, name).
+    """
+    catalog = []
+    hhmm_files = []
+    for f in os.listdir(gps_source_path):
+        try:
+            match = T04_FULL_TIME_PATTERN.search(f)
+            if match:
+                catalog.append((datetime.strptime(match.group(1), "%Y%m%d%H%M"), f))
+                continue
+            match = T04_HHMM_PATTERN.search(f)
+            if match:
+                hhmm_files.append((datetime.strptime(match.group(1), "%H%M").time(), f))
+        except ValueError as e:
+            print(f"Warning: Could not read the start time of '{f}' ({e}). Skipping.")
+
+    catalog.sort()
+    names = [f for _, f in catalog]
+    times = [start for start, _ in catalog]
+    return names, times, hhmm_files
+
+
+def _catalog_for_range(names, times, hhmm_files, start_dt, end_dt):
+    """
+    The catalog with the HHMM-only files dated on every day around one flight
+    (the day before its start up to the day after its end, so logs started before
+    midnight or ending after it are found), re-sorted by start time.
+    """
+    if not hhmm_files:
+        return names, times
+    dated = list(zip(times, names))
+    day = start_dt.date() - timedelta(days=1)
+    while day <= end_dt.date() + timedelta(days=1):
+        dated.extend((datetime.combine(day, time_of_day), f) for time_of_day, f in hhmm_files)
+        day += timedelta(days=1)
+    dated.sort()
+    return [f for _, f in dated], [t for t, _ in dated]
+
+
+def select_t04_ranges(catalog, ranges):
+    """
+    Resolves every flight time range against the T04 catalog from
+    build_t04_catalog() with a binary search. For each range the first file is
+    the last one starting at or before the range start, and the last file is the
+    first one starting at or after the range end (both at minute resolution,
+    like the file names).
+
+    Returns:
+        list: One list of file names per range, in start time order, or None where
+              no file matches.
+    """
+    names, times, hhmm_files = catalog
+    selections = []
+    for start_dt, end_dt in ranges:
+        range_names, range_times = _catalog_for_range(names, times, hhmm_files, start_dt, end_dt)
+        first = bisect_right(range_times, start_dt.replace(second=0, microsecond=0)) - 1
+        last = bisect_left(range_times, end_dt.replace(second=0, microsecond=0))
+        if first < 0 or last >= len(range_times):
+            selections.append(None)
+            continue
+        # An HHMM-only file appears once per candidate day; keep its first occurrence
+        selections.append(list(dict.fromkeys(range_names[first: last + 1])))
+    return selections
 
 
 def process_flight_data(main_folder):
@@ -10,9 +96,10 @@ def process_flight_data(main_folder):
 
     This script searches for a central 'GPS_data' folder. It then recursively
     walks through the entire main_folder directory tree to find every
-    'imu_gps.txt' file. For each one found, it determines a time range,
-    finds the corresponding .T04 files from the central folder, and copies
-    them into a new 'gps_data' subfolder alongside the 'imu_gps.txt'.
+    'imu_gps.txt' file and reads the time range of each. All ranges are then
+    matched against the catalog of .T04 files (sorted by full UTC start time)
+    in one batch, and the matching files are copied into a new 'gps_data'
+    subfolder alongside each 'imu_gps.txt'.
     """
     # Step 1: Locate the central GPS data source folder
     gps_source_folder_name = "GPS_data"
@@ -22,130 +109,71 @@ def process_flight_data(main_folder):
         print(f"Error: The central '{gps_source_folder_name}' folder was not found directly inside '{main_folder}'.")
         return
 
-    # Step 2: Read and parse all .T04 files from the source folder once for efficiency
+    # Step 2: Recursively walk through the entire main_folder directory tree
+    # and read the time range of every imu_gps.txt.
+    # Time ranges come from a local cache keyed by file size and mtime, so a rerun
+    # over a date folder only reads the imu_gps.txt files that changed.
+    print(f"\nStarting recursive search for 'imu_gps.txt' in '{main_folder}'...")
+    range_cache = imu_gps.open_cache()
+    flights = []
+    for dirpath, _, filenames in os.walk(main_folder):
+        if "imu_gps.txt" not in filenames:
+            continue
+
+        imu_file_path = os.path.join(dirpath, "imu_gps.txt")
+        print(f"\n--- Found file: {imu_file_path} ---")
+        try:
+            time_range = imu_gps.cached_time_range(range_cache, imu_file_path)
+        except Exception as e:
+            print(f"An unexpected error occurred while processing {dirpath}: {e}")
+            continue
+        if time_range is None:
+            print(f"Warning: No usable records (or unknown header format) in '{imu_file_path}'. Skipping.")
+            continue
+        start_dt, end_dt, dialect = time_range
+        print(f"Detected '{dialect}' header format. Time range found (UTC): {start_dt} to {end_dt}")
+        flights.append((dirpath, start_dt, end_dt))
+    range_cache.close()
+
+    if not flights:
+        print("\nNo usable 'imu_gps.txt' files found.")
+        return
+
+    # Step 3: Catalog all .T04 files from the source folder once
     try:
-        all_files_in_gps_source = os.listdir(gps_source_path)
-        t04_files = sorted([f for f in all_files_in_gps_source if f.endswith(".T04")])
-        if not t04_files:
+        catalog = build_t04_catalog(gps_source_path)
+        if not catalog[0] and not catalog[2]:
             print(f"Warning: No .T04 files were found in '{gps_source_path}'. The script cannot continue.")
             return
-
-        t04_file_times = []
-        for f in t04_files:
-            time_str = f[-8:-4]
-            if time_str.isdigit():
-                t04_file_times.append((f, int(time_str)))
     except Exception as e:
         print(f"Error reading or parsing files from '{gps_source_path}': {e}")
         return
 
-    # Step 3: Recursively walk through the entire main_folder directory tree
-    # This will check every subfolder at every level.
-    print(f"\nStarting recursive search for 'imu_gps.txt' in '{main_folder}'...")
-    for dirpath, _, filenames in os.walk(main_folder):
-        # Check if an 'imu_gps.txt' file exists in the current directory
-        if "imu_gps.txt" in filenames:
-
-            # The folder containing imu_gps.txt is our target processing folder
-            imu_folder_path = dirpath
-
-            print(f"\n--- Found file. Processing folder: {imu_folder_path} ---")
-            imu_file_path = os.path.join(imu_folder_path, "imu_gps.txt")
-
-            try:
-                # The rest of the logic is the same, but it now operates on the
-                # deeply nested folder path found by os.walk().
-
-                with open(imu_file_path, 'r', errors='ignore') as f:
-                    first_line = f.readline()
-
-                headers = None
-                timestamp_column_name = None
-                date_format_string = None
-
-                if "Timestamp" in first_line and "Status" in first_line:
-                    print("Detected 'Timestamp' (new) header format.")
-                    headers = ["Roll", "Pitch", "Yaw", "Lat", "Lon", "Alt", "Timestamp", "Gps_UTC_Date&Time", "Status",
-                               "Heading"]
-                    timestamp_column_name = "Gps_UTC_Date&Time"
-                    date_format_string = "%Y/%m/%d %H:%M:%S"
-                elif "Gps_Raw_Date&Time" in first_line:
-                    print("Detected 'Gps_Raw_Date&Time' (old) header format.")
-                    headers = ["Roll", "Pitch", "Yaw", "Lat", "Lon", "Alt", "GPS_UTC", "Gps_UTC_Date&Time",
-                               "Track_Angle", "Geoid_Separation", "SystemTime", "Speed", "Gps_Raw_Date&Time"]
-                    timestamp_column_name = "Gps_Raw_Date&Time"
-                    date_format_string = "%Y/%b/%d %H:%M:%S"
-                else:
-                    print(f"Warning: Unknown header format in '{imu_file_path}'. Skipping.")
-                    continue
-
-                df = pd.read_csv(
-                    imu_file_path, sep='\t', header=None, names=headers,
-                    skiprows=1, on_bad_lines='skip', dtype=str
-                ).dropna(subset=[timestamp_column_name])
-
-                if df.empty:
-                    print(f"Warning: '{imu_file_path}' is empty or has no valid timestamp data.")
-                    continue
-
-                non_zero_roll = df[df['Roll'].astype(float) != 0]
-                if non_zero_roll.empty:
-                    print(f"Warning: No rows with Roll != 0 found in '{imu_file_path}'.")
-                    continue
-
-                start_row = non_zero_roll.iloc[0]
-                start_time_value = start_row[timestamp_column_name]
-                end_time_value = df.iloc[-1][timestamp_column_name]
-
-                start_dt = datetime.strptime(start_time_value.split('.')[0], date_format_string)
-                end_dt = datetime.strptime(end_time_value.split('.')[0], date_format_string)
-
-                hour_min_time_start = int(f"{start_dt.hour:02d}{start_dt.minute:02d}")
-                hour_min_time_end = int(f"{end_dt.hour:02d}{end_dt.minute:02d}")
-
-                print(f"Time range found (HourMin): {hour_min_time_start:04d} to {hour_min_time_end:04d}")
-
-                start_t04_file, end_t04_file = None, None
-                candidate_start_files = [item for item in t04_file_times if item[1] <= hour_min_time_start]
-                if candidate_start_files:
-                    start_t04_file = max(candidate_start_files, key=lambda item: item[1])[0]
-
-                candidate_end_files = [item for item in t04_file_times if item[1] >= hour_min_time_end]
-                if candidate_end_files:
-                    end_t04_file = min(candidate_end_files, key=lambda item: item[1])[0]
-
-                if not start_t04_file or not end_t04_file:
-                    print("Could not find matching .T04 files for the identified time range.")
-                    continue
-
-                if t04_files.index(start_t04_file) > t04_files.index(end_t04_file):
-                    print(
-                        f"Error: Identified start file '{start_t04_file}' comes after end file '{end_t04_file}'. Skipping copy.")
-                    continue
-
-                print(f"Identified start file: {start_t04_file}")
-                print(f"Identified end file: {end_t04_file}")
-
-                start_index = t04_files.index(start_t04_file)
-                end_index = t04_files.index(end_t04_file)
-                files_to_copy = t04_files[start_index: end_index + 1]
-
-                # Create the destination folder inside the folder where the imu_gps.txt was found
-                destination_folder = os.path.join(imu_folder_path, "gps_data")
-                os.makedirs(destination_folder, exist_ok=True)
-
-                print(f"Copying {len(files_to_copy)} files to '{destination_folder}'...")
-                for file_name in files_to_copy:
-                    source_file = os.path.join(gps_source_path, file_name)
-                    destination_file = os.path.join(destination_folder, file_name)
-                    if not os.path.exists(destination_file):
-                        shutil.copy2(source_file, destination_file)
-                print("Copy complete.")
-
-            except ValueError as ve:
-                print(f"A date format error occurred processing the file: {ve}.")
-            except Exception as e:
-                print(f"An unexpected error occurred while processing {imu_folder_path}: {e}")
+    # Step 4: Match all flights to their .T04 files in one pass
+    selections = select_t04_ranges(catalog, [(start_dt, end_dt) for _, start_dt, end_dt in flights])
+
+    for (imu_folder_path, _, _), files_to_copy in zip(flights, selections):
+        print(f"\n--- Processing folder: {imu_folder_path} ---")
+        if files_to_copy is None:
+            print("Could not find matching .T04 files for the identified time range.")
+            continue
+
+        print(f"Identified start file: {files_to_copy[0]}")
+        print(f"Identified end file: {files_to_copy[-1]}")
+
+        # Create the destination folder inside the folder where the imu_gps.txt was found
+        destination_folder = os.path.join(imu_folder_path, "gps_data")
+        try:
+            os.makedirs(destination_folder, exist_ok=True)
+            print(f"Copying {len(files_to_copy)} files to '{destination_folder}'...")
+            for file_name in files_to_copy:
+                source_file = os.path.join(gps_source_path, file_name)
+                destination_file = os.path.join(destination_folder, file_name)
+                if not os.path.exists(destination_file):
+                    shutil.copy2(source_file, destination_file)
+            print("Copy complete.")
+        except Exception as e:
+            print(f"An unexpected error occurred while copying to {destination_folder}: {e}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,118 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import imu_trajectory
+
+# --- Configuration ---
+MATCHING_WINDOW_SECONDS = 120
+# Camera clocks run on local time; hours subtracted to get UTC
+PHOTO_DATETIME_SUBTRACT_HOURS = 4
+
+# 'cap-07-17-11.250.jpg', or any name with HH-MM-SS.mmm / HH_MM_SS_mmm / HHMMSS.mmm in it
+PHOTO_TIME_PATTERN = r"(\d{2})[-_:]?(\d{2})[-_:]?(\d{2})[\._](\d{3})"
+
+
+def parse_photo_times(filenames, date, subtract_hours=PHOTO_DATETIME_SUBTRACT_HOURS):
+    """
+    Parses the capture time of every photo name in one vectorized pass.
+
+    Args:
+        filenames (list): Photo file names.
+        date (datetime.date): Date the photos were taken (the names only hold the time).
+        subtract_hours (float): Camera clock offset, subtracted to get UTC.
+
+    Returns:
+        pandas.Series: datetime64[ns] UTC times, NaT where the name has no time.
+    """
+    parts = pd.Series(filenames, dtype=str).str.extract(PHOTO_TIME_PATTERN).astype(float)
+    offsets = (pd.to_timedelta(parts[0], unit='h') + pd.to_timedelta(parts[1], unit='m')
+               + pd.to_timedelta(parts[2], unit='s') + pd.to_timedelta(parts[3], unit='ms'))
+    return pd.Timestamp(date) + offsets - pd.Timedelta(hours=subtract_hours)
+
+
+def interpolate_positions(trajectory, times, window_seconds=MATCHING_WINDOW_SECONDS):
+    """
+    Linearly interpolates lat/lon/alt between the two fixes that bracket each time.
+    Times outside the trajectory, or whose nearest fix is further than
+    window_seconds away, get NaN positions.
+
+    Args:
+        trajectory (numpy structured array): From imu_trajectory.load_trajectory().
+        times (array-like): datetime64 UTC times.
+        window_seconds (float): Maximum distance to the nearest fix.
+
+    Returns:
+        dict: 'lat', 'lon', 'alt' and 'time_diff_seconds' arrays.
+    """
+    fix_times = np.asarray(trajectory["time"], dtype="i8")
+    t = np.asarray(times, dtype="datetime64[ns]").view("i8")
+    missing = np.isnat(np.asarray(times, dtype="datetime64[ns]"))
+
+    right = np.clip(np.searchsorted(fix_times, t, side='left'), 1, len(fix_times) - 1)
+    left = right - 1
+    t_left, t_right = fix_times[left], fix_times[right]
+    span = np.where(t_right > t_left, t_right - t_left, 1)
+    weight = np.clip((t - t_left) / span, 0.0, 1.0)
+
+    nearest_ns = np.minimum(np.abs(t - t_left), np.abs(t_right - t))
+    time_diff = nearest_ns / 1e9
+    invalid = missing | (t < fix_times[0]) | (t > fix_times[-1]) | (time_diff > window_seconds)
+
+    result = {}
+    for field in ("lat", "lon", "alt"):
+        values = np.asarray(trajectory[field])
+        interpolated = values[left] + (values[right] - values[left]) * weight
+        result[field] = np.where(invalid, np.nan, interpolated)
+    result["time_diff_seconds"] = np.where(invalid, np.nan, time_diff)
+    return result
+
+
+def geotag_photos(photo_folder, imu_file_path, date, output_csv=None,
+                  subtract_hours=PHOTO_DATETIME_SUBTRACT_HOURS, window_seconds=MATCHING_WINDOW_SECONDS):
+    """
+    Assigns an interpolated position to every .jpg in photo_folder from the flight's
+    IMU/GPS trajectory and writes them to a CSV.
+
+    Args:
+        photo_folder (str): Folder containing the camera photos.
+        imu_file_path (str): imu_gps.txt of the flight (converted to .npy on first use).
+        date (datetime.date): Date the photos were taken.
+        output_csv (str): Defaults to 'photo_positions.csv' in photo_folder.
+
+    Returns:
+        pandas.DataFrame: One row per photo.
+    """
+    filenames = sorted(f for f in os.listdir(photo_folder) if f.lower().endswith(('.jpg', '.jpeg')))
+    if not filenames:
+        print(f"No photos found in '{photo_folder}'.")
+        return None
+
+    trajectory = imu_trajectory.load_trajectory(imu_file_path)
+    if len(trajectory) < 2:
+        print(f"Error: The trajectory of '{imu_file_path}' has fewer than two fixes.")
+        return None
+
+    times = parse_photo_times(filenames, date, subtract_hours)
+    positions = interpolate_positions(trajectory, times.to_numpy(dtype="datetime64[ns]"), window_seconds)
+    df = pd.DataFrame({"filename": filenames, "datetime": times, **positions})
+
+    matched = int(df["lat"].notna().sum())
+    print(f"Geotagged {matched} of {len(df)} photo(s) within ±{window_seconds} seconds.")
+    unparsed = int(df["datetime"].isna().sum())
+    if unparsed:
+        print(f"Warning: {unparsed} photo name(s) had no parsable time.")
+
+    output_csv = output_csv or os.path.join(photo_folder, "photo_positions.csv")
+    df.to_csv(output_csv, index=False)
+    print(f"Positions saved to {output_csv}")
+    return df
+
+
+if __name__ == "__main__":
+    import datetime
+
+    photo_folder_path = r"C:\Users\olivi\Desktop\PhaseOne IXM-100 photos\oct_3"
+    imu_gps_path = r"\\RosorFieldNas1\Home\TECK_WHITE_EARTH\TECK_HYPERSPEC\0714\imu_gps.txt"
+    geotag_photos(photo_folder_path, imu_gps_path, datetime.date(2024, 10, 3))
@@ -0,0 +1,138 @@
+import os
+import sqlite3
+from datetime import datetime
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".rosor", "imu_gps_cache.sqlite")
+
+# The two imu_gps.txt layouts written by the Headwall software. Both are tab separated
+# with one header line; 'timestamp' is the column used as the UTC time of a record.
+DIALECTS = {
+    "new": {
+        "columns": ["Roll", "Pitch", "Yaw", "Lat", "Lon", "Alt", "Timestamp", "Gps_UTC_Date&Time", "Status",
+                    "Heading"],
+        "timestamp": "Gps_UTC_Date&Time",
+        "format": "%Y/%m/%d %H:%M:%S",
+    },
+    "old": {
+        "columns": ["Roll", "Pitch", "Yaw", "Lat", "Lon", "Alt", "GPS_UTC", "Gps_UTC_Date&Time",
+                    "Track_Angle", "Geoid_Separation", "SystemTime", "Speed", "Gps_Raw_Date&Time"],
+        "timestamp": "Gps_Raw_Date&Time",
+        "format": "%Y/%b/%d %H:%M:%S",
+    },
+}
+
+# Bytes read per step when scanning backwards from the end of the file.
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+def detect_dialect(first_line):
+    """Returns 'new' or 'old' for an imu_gps.txt header line, or None if unknown."""
+    if "Timestamp" in first_line and "Status" in first_line:
+        return "new"
+    if "Gps_Raw_Date&Time" in first_line:
+        return "old"
+    return None
+
+
+def parse_record(line, dialect):
+    """
+    Parses one data line into (roll, utc_datetime). Returns None for lines that
+    are malformed, have too many fields or have no parsable timestamp.
+    """
+    spec = DIALECTS[dialect]
+    fields = line.rstrip('\r\n').split('\t')
+    ts_index = spec["columns"].index(spec["timestamp"])
+    if len(fields) > len(spec["columns"]) or len(fields) <= ts_index:
+        return None
+    try:
+        roll = float(fields[0])
+        timestamp = datetime.strptime(fields[ts_index].strip().split('.')[0], spec["format"])
+    except ValueError:
+        return None
+    return roll, timestamp
+
+
+def _iter_lines_reversed(f, block_size=TAIL_BLOCK_SIZE):
+    """Yields the lines of a binary file from last to first, reading it from the end in blocks."""
+    f.seek(0, os.SEEK_END)
+    position = f.tell()
+    remainder = b''
+    while position > 0:
+        step = min(block_size, position)
+        position -= step
+        f.seek(position)
+        block = f.read(step) + remainder
+        lines = block.split(b'\n')
+        # The first piece may be the tail of a line that starts in the previous block
+        remainder = lines.pop(0)
+        for line in reversed(lines):
+            yield line
+    yield remainder
+
+
+def read_time_range(imu_file_path):
+    """
+    Returns (start, end, dialect) for an imu_gps.txt without loading it: start is
+    the time of the first record with a non-zero Roll (scanning forward from the
+    top) and end the time of the last valid record (scanning backward from the
+    end of the file). Returns None if the header is unknown or no record qualifies.
+    """
+    with open(imu_file_path, 'rb') as f:
+        dialect = detect_dialect(f.readline().decode('utf-8', errors='ignore'))
+        if dialect is None:
+            return None
+
+        start = None
+        for raw in f:
+            record = parse_record(raw.decode('utf-8', errors='ignore'), dialect)
+            if record and record[0] != 0:
+                start = record[1]
+                break
+        if start is None:
+            return None
+
+        for raw in _iter_lines_reversed(f):
+            record = parse_record(raw.decode('utf-8', errors='ignore'), dialect)
+            if record:
+                return start, record[1], dialect
+    return None
+
+
+def open_cache(db_path=DEFAULT_CACHE_PATH):
+    """Opens (and creates, if needed) the local cache of imu_gps.txt time ranges."""
+    folder = os.path.dirname(db_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("""CREATE TABLE IF NOT EXISTS time_ranges (
+                        path    TEXT PRIMARY KEY,
+                        size    INTEGER,
+                        mtime   REAL,
+                        dialect TEXT,
+                        start   TEXT,
+                        end     TEXT)""")
+    return conn
+
+
+def cached_time_range(conn, imu_file_path):
+    """
+    Same as read_time_range(), but answered from the cache when the file's size
+    and mtime are unchanged since it was last read. Files without a usable range
+    are cached too, so they are not re-read on every run.
+    """
+    imu_file_path = os.path.normpath(imu_file_path)
+    st = os.stat(imu_file_path)
+    row = conn.execute("SELECT size, mtime, dialect, start, end FROM time_ranges WHERE path = ?",
+                       (imu_file_path,)).fetchone()
+    if row and (row[0], row[1]) == (st.st_size, st.st_mtime):
+        if row[3] is None:
+            return None
+        return datetime.fromisoformat(row[3]), datetime.fromisoformat(row[4]), row[2]
+
+    result = read_time_range(imu_file_path)
+    start, end, dialect = result if result else (None, None, None)
+    conn.execute("INSERT OR REPLACE INTO time_ranges VALUES (?, ?, ?, ?, ?, ?)",
+                 (imu_file_path, st.st_size, st.st_mtime, dialect,
+                  start.isoformat() if start else None, end.isoformat() if end else None))
+    conn.commit()
+    return result
@@ -0,0 +1,125 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import imu_gps
+
+TRAJECTORY_NAME = "imu_gps.npy"
+
+# One record per IMU/GPS fix. 'time' is UTC in nanoseconds since the epoch, so
+# trajectory['time'].view('datetime64[ns]') gives datetimes directly.
+TRAJECTORY_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("lat", "<f8"),
+    ("lon", "<f8"),
+    ("alt", "<f8"),
+    ("roll", "<f8"),
+    ("pitch", "<f8"),
+    ("yaw", "<f8"),
+])
+
+# Rows parsed per pandas chunk while converting.
+CONVERT_CHUNK_ROWS = 500_000
+
+
+def trajectory_path(imu_file_path):
+    """Path of the converted trajectory that belongs to an imu_gps.txt."""
+    return os.path.join(os.path.dirname(imu_file_path), TRAJECTORY_NAME)
+
+
+def _parse_times(values, date_format):
+    """Vectorized timestamp parsing ('2025/07/14 17:38:03.250'), fractional seconds kept."""
+    values = values.astype(str).str.strip()
+    parts = values.str.split('.', n=1, expand=True)
+    times = pd.to_datetime(parts[0], format=date_format, errors='coerce')
+    if parts.shape[1] > 1:
+        fraction = pd.to_numeric('0.' + parts[1].fillna('0'), errors='coerce').fillna(0.0)
+        times = times + pd.to_timedelta(fraction, unit='s')
+    return times
+
+
+def convert_imu_gps(imu_file_path, output_path=None, chunk_rows=CONVERT_CHUNK_ROWS):
+    """
+    Converts an imu_gps.txt (either header dialect) into a NumPy structured array
+    with TRAJECTORY_DTYPE, sorted by time, saved as .npy so it can be memory-mapped.
+    Rows without a valid timestamp are dropped.
+
+    Args:
+        imu_file_path (str): Path to the imu_gps.txt file.
+        output_path (str): Defaults to 'imu_gps.npy' next to the input.
+        chunk_rows (int): Rows parsed at a time, bounding memory use on long flights.
+
+    Returns:
+        str: Path of the written .npy file.
+    """
+    with open(imu_file_path, 'r', errors='ignore') as f:
+        dialect = imu_gps.detect_dialect(f.readline())
+    if dialect is None:
+        raise ValueError(f"Unknown header format in '{imu_file_path}'")
+    spec = imu_gps.DIALECTS[dialect]
+
+    chunks = []
+    reader = pd.read_csv(imu_file_path, sep='\t', header=None, names=spec["columns"], skiprows=1,
+                         on_bad_lines='skip', dtype=str, chunksize=chunk_rows)
+    for df in reader:
+        times = _parse_times(df[spec["timestamp"]], spec["format"])
+        valid = times.notna().to_numpy()
+        if not valid.any():
+            continue
+        chunk = np.empty(int(valid.sum()), dtype=TRAJECTORY_DTYPE)
+        chunk["time"] = times[valid].to_numpy(dtype="datetime64[ns]").view("i8")
+        for field, column in (("lat", "Lat"), ("lon", "Lon"), ("alt", "Alt"),
+                              ("roll", "Roll"), ("pitch", "Pitch"), ("yaw", "Yaw")):
+            chunk[field] = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype="f8")[valid]
+        chunks.append(chunk)
+
+    trajectory = np.concatenate(chunks) if chunks else np.empty(0, dtype=TRAJECTORY_DTYPE)
+    trajectory = trajectory[np.argsort(trajectory["time"], kind='stable')]
+
+    output_path = output_path or trajectory_path(imu_file_path)
+    temp_path = output_path + ".part.npy"
+    np.save(temp_path, trajectory)
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+def is_up_to_date(imu_file_path, output_path=None):
+    """True if the converted trajectory exists and is newer than the imu_gps.txt."""
+    output_path = output_path or trajectory_path(imu_file_path)
+    return os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(imu_file_path)
+
+
+def load_trajectory(imu_file_path, mmap=True):
+    """
+    Returns the trajectory of an imu_gps.txt as a structured array, converting it
+    first if the .npy is missing or stale. With mmap=True the array is memory-mapped
+    read-only instead of read into memory.
+    """
+    if not is_up_to_date(imu_file_path):
+        convert_imu_gps(imu_file_path)
+    return np.load(trajectory_path(imu_file_path), mmap_mode='r' if mmap else None)
+
+
+def convert_all(main_folder):
+    """Converts every imu_gps.txt under main_folder whose trajectory is missing or stale."""
+    converted, skipped = 0, 0
+    for dirpath, _, filenames in os.walk(main_folder):
+        if "imu_gps.txt" not in filenames:
+            continue
+        imu_file_path = os.path.join(dirpath, "imu_gps.txt")
+        if is_up_to_date(imu_file_path):
+            skipped += 1
+            continue
+        try:
+            output_path = convert_imu_gps(imu_file_path)
+            converted += 1
+            print(f"✓ {output_path}")
+        except Exception as e:
+            print(f"× Failed to convert {imu_file_path}: {e}")
+    print(f"\nConverted {converted} file(s); {skipped} already up to date.")
+
+
+if __name__ == "__main__":
+    main_folder_path = r"\\RosorFieldNas1\Home\TECK_WHITE_EARTH\TECK_HYPERSPEC\0714"
+    convert_all(main_folder_path)
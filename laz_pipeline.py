@@ -0,0 +1,213 @@
+import os
+import glob
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import laspy
+import shapely
+
+# Points read per chunk; memory per chunk is roughly CHUNK_POINTS x 100 bytes.
+CHUNK_POINTS = 2_000_000
+
+# Voxel indices are packed into one int64 key, 21 bits per axis.
+_AXIS_BITS = 21
+_AXIS_MAX = (1 << _AXIS_BITS) - 1
+
+
+def create_unique_filepath(base_filepath):
+    # Function to create a unique file path by adding a version number
+    if not os.path.exists(base_filepath):
+        return base_filepath
+
+    base, ext = os.path.splitext(base_filepath)
+    version = 2
+
+    while os.path.exists(f"{base}_v{version}{ext}"):
+        version += 1
+
+    return f"{base}_v{version}{ext}"
+
+
+def crop_mask(x, y, bbox=None, polygon=None):
+    """
+    Mask of the points inside bbox (xmin, ymin, xmax, ymax) and/or a shapely
+    polygon (tested in one vectorized contains_xy call per chunk).
+    """
+    mask = np.ones(len(x), dtype=bool)
+    if bbox is not None:
+        xmin, ymin, xmax, ymax = bbox
+        mask &= (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
+    if polygon is not None and mask.any():
+        shapely.prepare(polygon)
+        idx = np.flatnonzero(mask)
+        mask[idx] = shapely.contains_xy(polygon, x[idx], y[idx])
+    return mask
+
+
+def voxel_keys(x, y, z, origin, voxel_size):
+    """One int64 key per point identifying its voxel of a grid anchored at origin."""
+    indices = []
+    for values, start, axis in ((x, origin[0], 'X'), (y, origin[1], 'Y'), (z, origin[2], 'Z')):
+        index = np.floor((values - start) / voxel_size).astype(np.int64)
+        if len(index) and (index.min() < 0 or index.max() > _AXIS_MAX):
+            raise ValueError(f"{axis} extent spans more than {_AXIS_MAX + 1} voxels of {voxel_size} "
+                             f"from the grid origin; use a larger voxel_size")
+        indices.append(index)
+    ix, iy, iz = indices
+    return (ix << (2 * _AXIS_BITS)) | (iy << _AXIS_BITS) | iz
+
+
+def keep_new_voxels(keys, seen):
+    """
+    Keeps the first point of every voxel not already in 'seen' (a sorted key array).
+
+    Returns:
+        tuple: (indices of the kept points, updated sorted 'seen' array)
+    """
+    unique_keys, first_index = np.unique(keys, return_index=True)
+    if len(seen):
+        pos = np.minimum(np.searchsorted(seen, unique_keys), len(seen) - 1)
+        fresh = seen[pos] != unique_keys
+        unique_keys, first_index = unique_keys[fresh], first_index[fresh]
+    seen = np.union1d(seen, unique_keys)
+    return np.sort(first_index), seen
+
+
+def merged_header(input_paths):
+    """
+    Output header for merging input_paths: point format, version and VLRs (CRS) of
+    the first file; offsets at the centre of the combined extent and scales coarsened
+    if the extent would not fit the LAS 32-bit integer coordinates.
+    """
+    mins, maxs = [], []
+    for path in input_paths:
+        with laspy.open(path) as reader:
+            mins.append(reader.header.mins)
+            maxs.append(reader.header.maxs)
+            if path == input_paths[0]:
+                first = reader.header
+    mins, maxs = np.min(mins, axis=0), np.max(maxs, axis=0)
+
+    header = laspy.LasHeader(point_format=first.point_format, version=first.version)
+    header.vlrs.extend(first.vlrs)
+    scales = np.array(first.scales, dtype=float)
+    half_extent = (maxs - mins) / 2.0
+    while np.any(half_extent / scales >= 2 ** 31 - 1):
+        scales = np.where(half_extent / scales >= 2 ** 31 - 1, scales * 10, scales)
+    header.scales = scales
+    header.offsets = np.round((mins + maxs) / 2.0)
+    return header, mins
+
+
+def _as_output_points(points, header):
+    """Copies a chunk into a record of the output header's format (dimensions both share)."""
+    if points.point_format.id == header.point_format.id and np.allclose(points.scales, header.scales) \
+            and np.allclose(points.offsets, header.offsets):
+        return points
+    out = laspy.ScaleAwarePointRecord.zeros(len(points), header=header)
+    out.x, out.y, out.z = points.x, points.y, points.z
+    source_dims = set(points.point_format.dimension_names)
+    for name in header.point_format.dimension_names:
+        if name not in ('X', 'Y', 'Z') and name in source_dims:
+            out[name] = points[name]
+    return out
+
+
+def stream_clouds(input_paths, output_path, voxel_size=None, bbox=None, polygon=None,
+                  chunk_points=CHUNK_POINTS, origin=None):
+    """
+    Streams one or more LAS/LAZ files into a single output, chunk by chunk: points are
+    cropped to bbox/polygon and, with voxel_size, only the first point of each voxel
+    is kept across all inputs. Memory is bounded by the chunk size plus one int64
+    key per kept voxel. The voxel grid is anchored at origin, by default the minimum
+    corner of the inputs.
+
+    Returns:
+        tuple: (points read, points written)
+    """
+    header, mins = merged_header(input_paths)
+    origin = mins if origin is None else origin
+    seen = np.empty(0, dtype=np.int64)
+    read = written = 0
+    with laspy.open(output_path, mode='w', header=header) as writer:
+        for path in input_paths:
+            with laspy.open(path) as reader:
+                for points in reader.chunk_iterator(chunk_points):
+                    read += len(points)
+                    x, y, z = np.asarray(points.x), np.asarray(points.y), np.asarray(points.z)
+                    keep = np.flatnonzero(crop_mask(x, y, bbox, polygon))
+                    if voxel_size and len(keep):
+                        kept, seen = keep_new_voxels(voxel_keys(x[keep], y[keep], z[keep], origin, voxel_size), seen)
+                        keep = keep[kept]
+                    if len(keep):
+                        writer.write_points(_as_output_points(points[keep], header))
+                        written += len(keep)
+    return read, written
+
+
+def _process_tile(input_path, output_path, voxel_size, bbox, polygon, chunk_points, origin):
+    return input_path, stream_clouds([input_path], output_path, voxel_size, bbox, polygon, chunk_points, origin)
+
+
+def subsample_merge(input_paths, output_path, voxel_size=None, bbox=None, polygon=None,
+                    max_workers=None, chunk_points=CHUNK_POINTS):
+    """
+    Crops, voxel-subsamples and merges LAS/LAZ tiles into one LAZ, headless (the
+    replacement for the CloudCompare '-SS SPATIAL ... -MERGE_CLOUDS' call).
+
+    With max_workers > 1 each tile is first cropped and subsampled on its own in a
+    process pool (into a temporary folder next to the output), and the much smaller
+    results are then merged with a final voxel pass that removes the duplicates
+    where tiles overlap. Both passes use the same voxel grid, anchored at the
+    minimum corner of all inputs, so the result matches a single pass.
+
+    Args:
+        input_paths (list): LAS/LAZ files.
+        output_path (str): Output .laz (or .las) file.
+        voxel_size (float): Voxel edge in CRS units, or None to keep every point.
+        bbox (tuple): Optional (xmin, ymin, xmax, ymax) crop.
+        polygon (shapely geometry): Optional crop polygon.
+        max_workers (int): Worker processes for the per-tile stage; 1 streams directly.
+    """
+    if max_workers == 1 or len(input_paths) == 1:
+        read, written = stream_clouds(input_paths, output_path, voxel_size, bbox, polygon, chunk_points)
+        print(f"Read {read:,} point(s), wrote {written:,} to {output_path}")
+        return output_path
+
+    # One grid for both passes; a voxel of margin absorbs the re-quantization of the per-tile outputs
+    origin = merged_header(input_paths)[1] - (voxel_size or 0)
+    temp_dir = tempfile.mkdtemp(prefix='laz_pipeline_', dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        tile_outputs = {}
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = []
+            for i, path in enumerate(input_paths):
+                tile_output = os.path.join(temp_dir, f"{i:05d}.laz")
+                tile_outputs[path] = tile_output
+                futures.append(pool.submit(_process_tile, path, tile_output, voxel_size, bbox, polygon,
+                                           chunk_points, origin))
+            for future in as_completed(futures):
+                path, (read, written) = future.result()
+                print(f"✓ {os.path.basename(path)}: {read:,} -> {written:,} point(s)")
+
+        read, written = stream_clouds([tile_outputs[p] for p in input_paths], output_path, voxel_size,
+                                      chunk_points=chunk_points, origin=origin)
+        print(f"Merged {read:,} point(s) into {written:,} in {output_path}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return output_path
+
+
+if __name__ == '__main__':
+    # All laz files of one flight
+    input_folder = r"E:\TEMP_DRONE_STUFF_V2\To2Fl1-L-2024-05-12-13-12-16\GeoreferenceResult"
+    input_files = sorted(glob.glob(os.path.join(input_folder, "*.laz")))
+
+    flight_folder = os.path.dirname(input_folder)
+    output_file_name = 'SubSamp_Merge_' + os.path.basename(flight_folder) + '.laz'
+    output_file_path = create_unique_filepath(os.path.join(input_folder, output_file_name))
+
+    subsample_merge(input_files, output_file_path, voxel_size=0.75)
+    print('Done')
@@ -0,0 +1,118 @@
+import os
+import sys
+import shutil
+
+import bulk_mover
+import envi_header
+
+# ioctl request for a copy-on-write clone on Linux (btrfs, XFS with reflink=1, ...)
+FICLONE = 0x40049409
+
+
+def _reflink(source_path, destination_path):
+    """Copy-on-write clone of a file. Raises OSError where the filesystem cannot do it."""
+    if sys.platform.startswith('linux'):
+        import fcntl
+        with open(source_path, 'rb') as src, open(destination_path, 'wb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            except OSError:
+                dst.close()
+                os.remove(destination_path)
+                raise
+        shutil.copystat(source_path, destination_path)
+    elif sys.platform == 'darwin':
+        import ctypes
+        libc = ctypes.CDLL('libc.dylib', use_errno=True)
+        if libc.clonefile(os.fsencode(source_path), os.fsencode(destination_path), 0) != 0:
+            raise OSError(ctypes.get_errno(), "clonefile failed")
+    else:
+        raise OSError("reflinks are not supported on this platform")
+
+
+def expose_file(source_path, destination_path):
+    """
+    Makes source_path available as destination_path without copying its data when
+    possible: a hardlink, else a copy-on-write reflink, else (different volume or no
+    support) a real copy.
+
+    Note that a hardlink is the same file under two names: writing to one changes
+    the other. Reflinks and copies are independent.
+
+    Returns:
+        str: 'hardlink', 'reflink' or 'copy'.
+    """
+    if bulk_mover.same_filesystem(source_path, os.path.dirname(destination_path)):
+        try:
+            os.link(source_path, destination_path)
+            return 'hardlink'
+        except OSError:
+            pass
+        try:
+            _reflink(source_path, destination_path)
+            return 'reflink'
+        except OSError:
+            pass
+    shutil.copy2(source_path, destination_path)
+    return 'copy'
+
+
+def expose_cubes(input_folder, output_folder, source_ext='.bsq', new_ext='.img'):
+    """
+    Exposes every '<name><source_ext>' cube in input_folder as '<name><new_ext>' in
+    output_folder, together with its ENVI header ('<name>.hdr'), without duplicating
+    the cube data on the same volume.
+
+    Args:
+        input_folder (str): Folder containing the cubes.
+        output_folder (str): Where the renamed cubes and headers are created.
+        source_ext (str): Extension of the cubes to expose.
+        new_ext (str): Extension they are exposed under.
+    """
+    if not os.path.isdir(input_folder):
+        print(f"Error: Input folder not found at '{input_folder}'")
+        return
+    os.makedirs(output_folder, exist_ok=True)
+
+    counts = {'hardlink': 0, 'reflink': 0, 'copy': 0}
+    bytes_saved = 0
+    bytes_copied = 0
+    for filename in sorted(os.listdir(input_folder)):
+        if not filename.lower().endswith(source_ext.lower()):
+            continue
+
+        stem = filename[:-len(source_ext)]
+        src_path = os.path.join(input_folder, filename)
+        dest_path = os.path.join(output_folder, stem + new_ext)
+        if os.path.exists(dest_path):
+            print(f"Skipped (already exists): {dest_path}")
+            continue
+
+        method = expose_file(src_path, dest_path)
+        counts[method] += 1
+        size = os.path.getsize(src_path)
+        if method == 'copy':
+            bytes_copied += size
+        else:
+            bytes_saved += size
+        print(f"{method.upper():8s} {filename} -> {os.path.basename(dest_path)}")
+
+        # ENVI looks for '<name>.hdr' next to '<name>.img'
+        src_hdr = envi_header.find_header(src_path)
+        dest_hdr = os.path.join(output_folder, stem + '.hdr')
+        if src_hdr is None:
+            print(f"  Warning: No .hdr found for '{filename}'.")
+        elif not os.path.exists(dest_hdr):
+            shutil.copy2(src_hdr, dest_hdr)
+
+    print(f"\nExposed {sum(counts.values())} cube(s): {counts['hardlink']} hardlinked, "
+          f"{counts['reflink']} reflinked, {counts['copy']} copied.")
+    print(f"Saved {bytes_saved / 1e9:.2f} GB of disk space; {bytes_copied / 1e9:.2f} GB had to be copied.")
+
+
+if __name__ == "__main__":
+    # Define the input and output folder paths
+    input_folder = "path/to/input/folder"  # Replace with the path to your input folder
+    output_folder = "path/to/output/folder"  # Replace with the path to your output folder
+
+    expose_cubes(input_folder, output_folder)
@@ -1,5 +1,7 @@
 import os
-import shutil
+
+import bulk_mover
+import nas_index
 
 
 def organize_rf_files(main_folder):
@@ -13,7 +15,10 @@ def organize_rf_files(main_folder):
         print(f"Error: Main folder not found at '{main_folder}'")
         return
 
-    for dirpath, dirnames, _ in os.walk(main_folder):
+    index = nas_index.open_index()
+    nas_index.refresh_index(index, main_folder)
+    move_totals = {"renamed": 0, "copied": 0, "skipped": 0, "failed": 0, "bytes_copied": 0}
+    for dirpath, dirnames, _ in nas_index.walk_index(index, main_folder):
         print(f"\n--- Scanning inside directory: {dirpath} ---")
 
         for subfolder_name in list(dirnames):
@@ -23,7 +28,8 @@ def organize_rf_files(main_folder):
             target_dir_path = os.path.join(dirpath, subfolder_name)
 
             try:
-                files_in_subdir = os.listdir(target_dir_path)
+                files_in_subdir = nas_index.listdir(index, target_dir_path)
+                indexed_files = nas_index.list_files(index, target_dir_path)
 
                 has_rf_files = any(
                     f.lower().endswith("_rf") or f.lower().endswith("rf.hdr")
@@ -37,7 +43,7 @@ def organize_rf_files(main_folder):
                     # Collect only _rf or rf.hdr files
                     files_to_move = [
                         f for f in files_in_subdir
-                        if os.path.isfile(os.path.join(target_dir_path, f)) and
+                        if f in indexed_files and
                            (f.lower().endswith("_rf") or f.lower().endswith("rf.hdr") or f.lower().endswith("rf.bin"))
                     ]
 
@@ -51,12 +57,17 @@ def organize_rf_files(main_folder):
                     os.makedirs(new_folder_path, exist_ok=True)
                     print(f"   -> Created/verified new folder: {new_folder_path}")
 
-                    # Move the files
+                    # Move the files (renamed in place when both folders share a volume)
+                    move_pairs = []
                     for filename in files_to_move:
                         source_path = os.path.join(target_dir_path, filename)
                         dest_path = os.path.join(new_folder_path, filename)
                         print(f"     -> MOVING: '{filename}'")
-                        shutil.move(source_path, dest_path)
+                        move_pairs.append((source_path, dest_path))
+
+                    stats = bulk_mover.move_files(move_pairs)
+                    for key in move_totals:
+                        move_totals[key] += stats[key]
 
                     # Prevent descending into the processed folder
                     dirnames.remove(subfolder_name)
@@ -66,6 +77,10 @@ def organize_rf_files(main_folder):
             except Exception as e:
                 print(f"An error occurred while processing subfolder {subfolder_name}: {e}")
 
+    index.close()
+    print(f"\nMoved {move_totals['renamed']} file(s) by rename and {move_totals['copied']} by copy "
+          f"({move_totals['skipped']} skipped as already present, {move_totals['failed']} failed); {move_totals['bytes_copied'] / 1e6:.1f} MB crossed volumes.")
+
 
 if __name__ == "__main__":
     main_folder_to_process = r"Y:\TECK_WHITE_EARTH\TECK_HYPERSPEC"
@@ -1,5 +1,6 @@
 import os
-import shutil
+
+import bulk_mover
 
 # --- User Inputs ---
 input_root_folder = r"Y:\TECK_WHITE_EARTH\TECK_HYPERSPEC"  # <-- change this
@@ -33,6 +34,7 @@ target_names = [
 def move_matching_folders(input_root, output_root, folder_names):
     os.makedirs(output_root, exist_ok=True)
 
+    folder_pairs = []
     for dirpath, dirnames, _ in os.walk(input_root):
         for dirname in dirnames:
             if dirname in folder_names:
@@ -42,8 +44,11 @@ def move_matching_folders(input_root, output_root, folder_names):
                 # Avoid overwriting existing folders
                 if not os.path.exists(dest_path):
                     print(f"Moving: {src_path} --> {dest_path}")
-                    shutil.move(src_path, dest_path)
+                    folder_pairs.append((src_path, dest_path))
                 else:
                     print(f"Skipped (already exists): {dest_path}")
 
+    # Planned into a manifest and moved in parallel; rerunning resumes an interrupted move.
+    bulk_mover.move_folders(folder_pairs, os.path.join(output_root, bulk_mover.MANIFEST_NAME))
+
 move_matching_folders(input_root_folder, output_folder, target_names)
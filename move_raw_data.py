@@ -1,6 +1,9 @@
 import os
 import shutil
 
+import bulk_mover
+import nas_index
+
 
 def organize_raw_files(main_folder):
     """
@@ -15,10 +18,14 @@ def organize_raw_files(main_folder):
         print(f"Error: Main folder not found at '{main_folder}'")
         return
 
-    # os.walk() will traverse the directory tree from the top down.
+    # The shared index is refreshed once (only folders whose mtime changed are
+    # re-listed) and then walked from the top down like os.walk().
     # 'dirpath' is the current folder path we are in.
     # 'dirnames' is a list of subfolders inside dirpath.
-    for dirpath, dirnames, _ in os.walk(main_folder):
+    index = nas_index.open_index()
+    nas_index.refresh_index(index, main_folder)
+    move_totals = {"renamed": 0, "copied": 0, "skipped": 0, "failed": 0, "bytes_copied": 0}
+    for dirpath, dirnames, _ in nas_index.walk_index(index, main_folder):
 
         print(f"\n--- Scanning inside directory: {dirpath} ---")
 
@@ -33,7 +40,8 @@ def organize_raw_files(main_folder):
 
             try:
                 # --- NEW LOGIC: Look inside the subdirectory ---
-                files_in_subdir = os.listdir(target_dir_path)
+                files_in_subdir = nas_index.listdir(index, target_dir_path)
+                indexed_files = nas_index.list_files(index, target_dir_path)
 
                 # Main Trigger Condition: The subdirectory must contain a mix of files.
                 has_other_files = any("_rf" not in f for f in files_in_subdir)
@@ -47,7 +55,7 @@ def organize_raw_files(main_folder):
                     files_to_move = []
 
                     for filename in files_in_subdir:
-                        if not os.path.isfile(os.path.join(target_dir_path, filename)):
+                        if filename not in indexed_files:
                             continue
                         if filename.startswith("SBET_"):
                             files_to_copy.append(filename)
@@ -73,11 +81,17 @@ def organize_raw_files(main_folder):
                         print(f"     -> COPYING (SBET): '{filename}'")
                         shutil.copy2(source_path, dest_path)
 
+                    move_pairs = []
                     for filename in files_to_move:
                         source_path = os.path.join(target_dir_path, filename)
                         dest_path = os.path.join(new_folder_path, filename)
                         print(f"     -> MOVING  (Other): '{filename}'")
-                        shutil.move(source_path, dest_path)
+                        move_pairs.append((source_path, dest_path))
+
+                    # Same-volume moves are atomic renames; only cross-device ones are copied.
+                    stats = bulk_mover.move_files(move_pairs)
+                    for key in move_totals:
+                        move_totals[key] += stats[key]
 
                     # IMPORTANT: Remove the processed folder from the list so os.walk doesn't go into it.
                     dirnames.remove(subfolder_name)
@@ -87,6 +101,10 @@ def organize_raw_files(main_folder):
             except Exception as e:
                 print(f"An error occurred while processing subfolder {subfolder_name}: {e}")
 
+    index.close()
+    print(f"\nMoved {move_totals['renamed']} file(s) by rename and {move_totals['copied']} by copy "
+          f"({move_totals['skipped']} skipped as already present, {move_totals['failed']} failed); {move_totals['bytes_copied'] / 1e6:.1f} MB crossed volumes.")
+
 
 if __name__ == "__main__":
     # --- IMPORTANT ---
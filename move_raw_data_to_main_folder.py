@@ -1,5 +1,7 @@
 import os
-import shutil
+
+import bulk_mover
+import nas_index
 
 
 def move_raw_folders(main_folder: str, destination_folder: str):
@@ -31,9 +33,9 @@ def move_raw_folders(main_folder: str, destination_folder: str):
     # A list to keep track of the folders we identify to move.
     folders_to_move = []
 
-    # 3. Use os.walk() to recursively find all folders to be moved.
+    # 3. Walk the shared directory index to find all folders to be moved.
     # We do this first to avoid modifying the directory tree while walking it.
-    for dirpath, dirnames, _ in os.walk(main_folder):
+    for dirpath, dirnames, _ in nas_index.walk(main_folder):
         for dirname in dirnames:
             if dirname.endswith("_RAW"):
                 # Construct the full path of the folder to be moved.
@@ -47,27 +49,13 @@ def move_raw_folders(main_folder: str, destination_folder: str):
 
     print(f"\nFound {len(folders_to_move)} folders to move. Starting operation...")
 
-    for source_path in folders_to_move:
-        try:
-            # Check if the source path still exists before trying to move it.
-            if os.path.isdir(source_path):
-                print(f"-> Moving '{source_path}'")
-
-                # shutil.move() will move the entire folder and its contents.
-                # It will place the folder *inside* the destination_folder.
-                shutil.move(source_path, destination_folder)
-
-                print(f"   -> Success.")
-            else:
-                print(f"-> Info: Folder '{source_path}' was already moved or deleted. Skipping.")
-
-        except shutil.Error as e:
-            # This specific error often means a folder with the same name already exists at the destination.
-            print(
-                f"   -> Error: Could not move folder. A folder with the same name might already exist at the destination. Details: {e}")
-        except Exception as e:
-            # Catch any other potential errors (e.g., permissions).
-            print(f"   -> Error: An unexpected error occurred. Details: {e}")
+    # Every file is planned into a manifest first, then copied on a thread pool and
+    # verified (size + checksum) before its source is deleted. If the run is
+    # interrupted, running the script again resumes from the manifest.
+    folder_pairs = [(source_path, os.path.join(destination_folder, os.path.basename(source_path)))
+                    for source_path in folders_to_move]
+    manifest_path = os.path.join(destination_folder, bulk_mover.MANIFEST_NAME)
+    bulk_mover.move_folders(folder_pairs, manifest_path)
 
 
 if __name__ == "__main__":
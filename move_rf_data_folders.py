@@ -1,5 +1,6 @@
 import os
-import shutil
+
+import bulk_mover
 
 
 def move_raw_folders(main_folder: str, destination_folder: str):
@@ -47,27 +48,13 @@ def move_raw_folders(main_folder: str, destination_folder: str):
 
     print(f"\nFound {len(folders_to_move)} folders to move. Starting operation...")
 
-    for source_path in folders_to_move:
-        try:
-            # Check if the source path still exists before trying to move it.
-            if os.path.isdir(source_path):
-                print(f"-> Moving '{source_path}'")
-
-                # shutil.move() will move the entire folder and its contents.
-                # It will place the folder *inside* the destination_folder.
-                shutil.move(source_path, destination_folder)
-
-                print(f"   -> Success.")
-            else:
-                print(f"-> Info: Folder '{source_path}' was already moved or deleted. Skipping.")
-
-        except shutil.Error as e:
-            # This specific error often means a folder with the same name already exists at the destination.
-            print(
-                f"   -> Error: Could not move folder. A folder with the same name might already exist at the destination. Details: {e}")
-        except Exception as e:
-            # Catch any other potential errors (e.g., permissions).
-            print(f"   -> Error: An unexpected error occurred. Details: {e}")
+    # Every file is planned into a manifest first, then copied on a thread pool and
+    # verified (size + checksum) before its source is deleted. If the run is
+    # interrupted, running the script again resumes from the manifest.
+    folder_pairs = [(source_path, os.path.join(destination_folder, os.path.basename(source_path)))
+                    for source_path in folders_to_move]
+    manifest_path = os.path.join(destination_folder, bulk_mover.MANIFEST_NAME)
+    bulk_mover.move_folders(folder_pairs, manifest_path)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
 import os
 import shutil
 
+import nas_index
+
 
 def sync_metadata_files_recursively(folder_a: str, folder_b: str):
     """
@@ -28,10 +30,14 @@ def sync_metadata_files_recursively(folder_a: str, folder_b: str):
 
     # --- Step 2: Index all subfolders ---
     print("\n--- Indexing all subfolders. This may take a moment... ---")
-    subfolders_in_a = {dirname: os.path.join(dirpath, dirname) for dirpath, dirnames, _ in os.walk(folder_a) for dirname
-                       in dirnames}
-    subfolders_in_b = {dirname: os.path.join(dirpath, dirname) for dirpath, dirnames, _ in os.walk(folder_b) for dirname
-                       in dirnames}
+    index = nas_index.open_index()
+    nas_index.refresh_index(index, folder_a)
+    nas_index.refresh_index(index, folder_b)
+    subfolders_in_a = {dirname: os.path.join(dirpath, dirname)
+                       for dirpath, dirnames, _ in nas_index.walk_index(index, folder_a) for dirname in dirnames}
+    subfolders_in_b = {dirname: os.path.join(dirpath, dirname)
+                       for dirpath, dirnames, _ in nas_index.walk_index(index, folder_b) for dirname in dirnames}
+    index.close()
     print(f"Found {len(subfolders_in_a)} subfolders in Folder A and {len(subfolders_in_b)} subfolders in Folder B.")
 
     # --- Step 3: Find matches and process ---
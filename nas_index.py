@@ -0,0 +1,228 @@
+import os
+import re
+import sqlite3
+
+
+# The index lives on the local machine, not on the share: SQLite locking over
+# SMB is unreliable and the whole point is to avoid round-trips to the NAS.
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".rosor", "nas_index.sqlite")
+
+# Same flight key the SBET sync groups VNIR/SWIR folders by (e.g. TECK_T1_F1_F2_2025_07_02).
+FLIGHT_KEY_PATTERN = re.compile(r"(TECK_[tT]\d+(?:_F\d+)+_\d{4}_\d{2}_\d{2})", re.IGNORECASE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path       TEXT PRIMARY KEY,
+    parent     TEXT,
+    name       TEXT NOT NULL,
+    mtime      REAL,
+    flight_key TEXT
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+CREATE INDEX IF NOT EXISTS dirs_flight_key ON dirs(flight_key);
+CREATE TABLE IF NOT EXISTS files (
+    dir   TEXT NOT NULL,
+    name  TEXT NOT NULL,
+    size  INTEGER,
+    mtime REAL,
+    PRIMARY KEY (dir, name)
+);
+"""
+
+
+def parse_flight_key(name):
+    """
+    Returns the upper-cased flight key (e.g. 'TECK_T1_F1_F2_2025_07_02') found in
+    a folder name, or None if the name does not contain one.
+    """
+    match = FLIGHT_KEY_PATTERN.search(name)
+    return match.group(1).upper() if match else None
+
+
+def open_index(db_path=DEFAULT_INDEX_PATH):
+    """
+    Opens (and creates, if needed) the on-disk directory index.
+
+    Args:
+        db_path (str): Path of the SQLite file holding the index.
+
+    Returns:
+        sqlite3.Connection: An open connection to the index.
+    """
+    folder = os.path.dirname(db_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _subtree_bounds(path):
+    # Every descendant path starts with 'path + sep'. Using a range instead of LIKE
+    # avoids the '_' wildcard, which appears in almost every flight folder name.
+    prefix = path.rstrip(os.sep) + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+def _forget_subtree(conn, path):
+    low, high = _subtree_bounds(path)
+    conn.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (path, low, high))
+    conn.execute("DELETE FROM files WHERE dir = ? OR (dir >= ? AND dir < ?)", (path, low, high))
+
+
+def _rescan_directory(conn, path, mtime):
+    """Lists one directory on the share and replaces its rows in the index."""
+    subdirs = []
+    files = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    files.append((path, entry.name, st.st_size, st.st_mtime))
+            except OSError:
+                continue
+
+    # Drop sub-folders that disappeared since the last scan, along with everything below them.
+    known = [row[0] for row in conn.execute("SELECT name FROM dirs WHERE parent = ?", (path,))]
+    for name in set(known) - set(subdirs):
+        _forget_subtree(conn, os.path.join(path, name))
+    # New sub-folders get a placeholder row (mtime NULL) so they are listed on their
+    # own visit, and are not forgotten if that visit fails.
+    conn.executemany(
+        "INSERT OR IGNORE INTO dirs (path, parent, name, mtime, flight_key) VALUES (?, ?, ?, NULL, ?)",
+        [(os.path.join(path, name), path, name, parse_flight_key(name)) for name in subdirs],
+    )
+
+    conn.execute("DELETE FROM files WHERE dir = ?", (path,))
+    conn.executemany("INSERT INTO files (dir, name, size, mtime) VALUES (?, ?, ?, ?)", files)
+    conn.execute(
+        "INSERT OR REPLACE INTO dirs (path, parent, name, mtime, flight_key) VALUES (?, ?, ?, ?, ?)",
+        (path, os.path.dirname(path), os.path.basename(path), mtime, parse_flight_key(os.path.basename(path))),
+    )
+    return subdirs
+
+
+def refresh_index(conn, root):
+    """
+    Brings the index for 'root' up to date. Every directory is stat'ed, but only
+    the ones whose mtime changed since the last refresh are listed again; for the
+    rest the stored children are reused.
+
+    Note that a directory's mtime only changes when entries are added, removed or
+    renamed inside it, so the stored size/mtime of a file that was rewritten in
+    place can be stale until its folder changes.
+
+    Args:
+        conn (sqlite3.Connection): Connection returned by open_index().
+        root (str): Top-level folder to index.
+
+    Returns:
+        tuple: (number of directories re-listed, number of directories reused).
+    """
+    root = os.path.normpath(root)
+    rescanned = 0
+    reused = 0
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            _forget_subtree(conn, path)
+            continue
+
+        row = conn.execute("SELECT mtime FROM dirs WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[0] == mtime:
+            children = [r[0] for r in conn.execute("SELECT name FROM dirs WHERE parent = ?", (path,))]
+            reused += 1
+        else:
+            try:
+                children = _rescan_directory(conn, path, mtime)
+            except PermissionError:
+                print(f"-> Permission denied for folder: '{path}'. Skipping.")
+                continue
+            rescanned += 1
+
+        stack.extend(os.path.join(path, name) for name in children)
+
+    conn.commit()
+    return rescanned, reused
+
+
+def list_subdirs(conn, path):
+    """Returns the sorted names of the indexed sub-folders of 'path'."""
+    path = os.path.normpath(path)
+    return [r[0] for r in conn.execute("SELECT name FROM dirs WHERE parent = ? ORDER BY name", (path,))]
+
+
+def list_files(conn, path):
+    """Returns {file name: (size, mtime)} for the indexed files directly inside 'path'."""
+    path = os.path.normpath(path)
+    return {name: (size, mtime) for name, size, mtime in
+            conn.execute("SELECT name, size, mtime FROM files WHERE dir = ?", (path,))}
+
+
+def listdir(conn, path):
+    """Index-backed equivalent of os.listdir(): sub-folder names followed by file names."""
+    return list_subdirs(conn, path) + sorted(list_files(conn, path))
+
+
+def walk_index(conn, root):
+    """
+    Index-backed equivalent of os.walk(root) (top-down). As with os.walk, removing
+    names from 'dirnames' in place stops the walk from descending into them.
+
+    Yields:
+        tuple: (dirpath, dirnames, filenames)
+    """
+    stack = [os.path.normpath(root)]
+    while stack:
+        dirpath = stack.pop()
+        dirnames = list_subdirs(conn, dirpath)
+        filenames = sorted(list_files(conn, dirpath))
+        yield dirpath, dirnames, filenames
+        stack.extend(os.path.join(dirpath, d) for d in reversed(dirnames))
+
+
+def walk(root, db_path=DEFAULT_INDEX_PATH):
+    """
+    Refreshes the index for 'root' and then walks it like os.walk().
+    Convenience wrapper for scripts that only need a single walk.
+    """
+    conn = open_index(db_path)
+    rescanned, reused = refresh_index(conn, root)
+    print(f"Index refreshed: {rescanned} folder(s) re-listed, {reused} unchanged.")
+    try:
+        yield from walk_index(conn, root)
+    finally:
+        conn.close()
+
+
+def find_flight_folders(conn, root):
+    """
+    Returns {flight key: [folder paths]} for every indexed folder under 'root'
+    whose name contains a flight key.
+    """
+    root = os.path.normpath(root)
+    low, high = _subtree_bounds(root)
+    groups = {}
+    rows = conn.execute(
+        "SELECT flight_key, path FROM dirs WHERE flight_key IS NOT NULL AND path >= ? AND path < ? ORDER BY path",
+        (low, high),
+    )
+    for key, path in rows:
+        groups.setdefault(key, []).append(path)
+    return groups
+
+
+if __name__ == "__main__":
+    main_folder_path = r"Y:\TECK_WHITE_EARTH\TECK_HYPERSPEC"
+
+    index = open_index()
+    changed, unchanged = refresh_index(index, main_folder_path)
+    print(f"Re-listed {changed} folder(s), reused {unchanged} unchanged folder(s).")
+    print(f"Found {len(find_flight_folders(index, main_folder_path))} unique flight data groups.")
+    index.close()
@@ -0,0 +1,113 @@
+import os
+import re
+import csv
+
+import fiona
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+import exif_gps
+
+
+def get_list_of_paths_os_walk_folder(folder_path, ext):
+    file_paths = []
+    for root, dirs, files in os.walk(folder_path):
+        for filename in files:
+            if os.path.splitext(filename)[1].lower() == ext.lower():
+                file_path = os.path.join(root, filename)
+                file_paths.append(file_path)
+
+    def natural_sort_key(s):
+        # This function will create a sort key that handles numbers properly
+        return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', s)]
+
+    file_paths.sort(key=natural_sort_key)
+    return file_paths
+
+
+def get_name_of_non_existing_output_file(base_filepath, additional_suffix='', new_extention=''):
+    # Function to create a unique file path by adding a version number
+    base, ext = os.path.splitext(base_filepath)
+    if new_extention:
+        ext = new_extention
+    new_out_file_path = f"{base}{additional_suffix}{ext}"
+
+    if not os.path.exists(new_out_file_path):
+        return new_out_file_path
+
+    version = 2
+    while os.path.exists(f"{base}{additional_suffix}_v{version}{ext}"):
+        version += 1
+    return f"{base}{additional_suffix}_v{version}{ext}"
+
+
+def get_photos_in_polygons(tile_polygon_paths, lat_list, lon_list):
+    """
+    Finds which photos fall inside the polygons of each shapefile.
+
+    The photo locations are loaded once into an STRtree of points; each shapefile
+    is then answered with a single bulk query of all its polygons against the
+    tree (polygon contains point), instead of testing every photo against every
+    polygon in Python. Photos without coordinates are never selected.
+
+    Args:
+        tile_polygon_paths (list): Shapefiles of flight-line/tile polygons (lon/lat).
+        lat_list (list): Photo latitudes (None where unknown).
+        lon_list (list): Photo longitudes (None where unknown).
+
+    Returns:
+        dict: {shapefile path: boolean numpy mask over the photos}
+    """
+    lats = np.array([np.nan if v is None else v for v in lat_list], dtype=float)
+    lons = np.array([np.nan if v is None else v for v in lon_list], dtype=float)
+    located = np.flatnonzero(np.isfinite(lats) & np.isfinite(lons))
+    tree = shapely.STRtree(shapely.points(lons[located], lats[located]))
+
+    boolean_mask_dict = {}
+    for tile_polygon_path in tile_polygon_paths:
+        with fiona.open(tile_polygon_path) as shapefile:
+            polygons = [shape(feature['geometry']) for feature in shapefile if feature['geometry']]
+
+        boolean_mask = np.zeros(len(lats), dtype=bool)
+        if polygons:
+            _, point_idx = tree.query(polygons, predicate='contains')
+            boolean_mask[located[point_idx]] = True
+        print(f"{os.path.basename(tile_polygon_path)}: {int(boolean_mask.sum())} of {len(lats)} photo(s) "
+              f"in {len(polygons)} polygon(s).")
+        boolean_mask_dict[tile_polygon_path] = boolean_mask
+    return boolean_mask_dict
+
+
+def save_photos_in_polygons(boolean_mask_dict, photo_paths, lat_list, lon_list):
+    """Writes one '<shapefile>_photo_locations.csv' per shapefile, next to its parent folder."""
+    for poly_path, mask in boolean_mask_dict.items():
+        name = os.path.join(os.path.dirname(os.path.dirname(poly_path)), os.path.basename(poly_path))
+        output_csv_file = get_name_of_non_existing_output_file(name,
+                                                               additional_suffix='_photo_locations',
+                                                               new_extention='.csv')
+        with open(output_csv_file, mode='w', newline='') as csvfile:
+            csv_writer = csv.writer(csvfile)
+            csv_writer.writerow(['Name', 'Longitude', 'Latitude'])
+            for i in np.flatnonzero(mask):
+                csv_writer.writerow([photo_paths[i], lon_list[i], lat_list[i]])
+        print(f"Data has been saved to {output_csv_file}")
+
+
+if __name__ == "__main__":
+    input_photo_folder = r"F:\LM2403-66 Dahrouge EGNC\Pix4DMatic processing\Eleonore 1\exports"
+    tile_polygon_paths = [
+        r"F:\LM2403-66 Dahrouge EGNC\Pix4DMatic processing\Eleonore 1\tiles\tiles.shp",
+    ]
+
+    photo_paths = get_list_of_paths_os_walk_folder(input_photo_folder, '.tiff')
+
+    positions = exif_gps.read_gps_batch(photo_paths)
+    lat_list = [lat for lat, _, _ in positions]
+    lon_list = [lon for _, lon, _ in positions]
+
+    if not any(lat is not None for lat in lat_list):
+        raise ValueError("No photos with GPS data found.")
+
+    boolean_mask_dict = get_photos_in_polygons(tile_polygon_paths, lat_list, lon_list)
+    save_photos_in_polygons(boolean_mask_dict, photo_paths, lat_list, lon_list)
@@ -0,0 +1,269 @@
+import numpy as np
+import laspy
+
+# Points read per chunk; memory per chunk is roughly CHUNK_POINTS x 100 bytes.
+CHUNK_POINTS = 5_000_000
+
+# Per-cell Z histogram resolution used for the streamed median; each refinement
+# pass narrows a cell's bounds MEDIAN_BINS-fold until they are within MEDIAN_TOLERANCE.
+MEDIAN_BINS = 64
+MEDIAN_TOLERANCE = 0.002
+
+# Upper bound on the per-cell histograms held at once (int32 x MEDIAN_BINS per cell).
+MAX_HISTOGRAM_BYTES = 256 * 1024 * 1024
+
+# Upper bound on the reads of the whole file per median; cells still wider than
+# MEDIAN_TOLERANCE then take the centre of their bounds.
+MEDIAN_MAX_PASSES = 16
+
+# A cell is part of the overlap when both clouds have at least this many points in it.
+MIN_POINTS_PER_CELL = 5
+
+
+def overlap_grid(reference_path, adjusted_path, cell_size):
+    """
+    Builds the shared XY grid over the bounding-box intersection of two clouds,
+    from their headers only.
+
+    Returns:
+        dict: 'x0', 'y0', 'cell_size', 'nx', 'ny', or None if the clouds do not overlap.
+    """
+    with laspy.open(reference_path) as a, laspy.open(adjusted_path) as b:
+        xmin = max(a.header.mins[0], b.header.mins[0])
+        ymin = max(a.header.mins[1], b.header.mins[1])
+        xmax = min(a.header.maxs[0], b.header.maxs[0])
+        ymax = min(a.header.maxs[1], b.header.maxs[1])
+    if xmax <= xmin or ymax <= ymin:
+        return None
+    return {
+        "x0": xmin,
+        "y0": ymin,
+        "cell_size": cell_size,
+        "nx": int(np.ceil((xmax - xmin) / cell_size)) or 1,
+        "ny": int(np.ceil((ymax - ymin) / cell_size)) or 1,
+    }
+
+
+def _cell_index(grid, x, y):
+    """Flat cell index of each point, and a mask of the points that fall inside the grid."""
+    col = np.floor((x - grid["x0"]) / grid["cell_size"]).astype(np.int64)
+    row = np.floor((y - grid["y0"]) / grid["cell_size"]).astype(np.int64)
+    inside = (col >= 0) & (col < grid["nx"]) & (row >= 0) & (row < grid["ny"])
+    return row * grid["nx"] + col, inside
+
+
+def _cell_z(las_path, grid, chunk_points, first_cell=0, last_cell=None):
+    """Yields (cell index relative to first_cell, z) for the points of each chunk inside cells [first_cell, last_cell)."""
+    with laspy.open(las_path) as reader:
+        for points in reader.chunk_iterator(chunk_points):
+            cells, inside = _cell_index(grid, np.asarray(points.x), np.asarray(points.y))
+            if last_cell is not None:
+                inside &= (cells >= first_cell) & (cells < last_cell)
+            yield cells[inside] - first_cell, np.asarray(points.z)[inside]
+
+
+def _refine_cells(las_path, grid, chunk_points, block, lo, hi, rank, bins):
+    """
+    One read of the file: fills a 'bins'-bucket histogram between lo and hi for each
+    cell of block (sorted flat indices) and narrows lo/hi in place to the bucket
+    holding the cell's middle point.
+    """
+    lo_b, hi_b = lo[block], hi[block]
+    span = hi_b - lo_b
+    histogram = np.zeros((len(block), bins), dtype=np.int32)
+    below = np.zeros(len(block), dtype=np.int64)
+    for cells, z in _cell_z(las_path, grid, chunk_points, block[0], block[-1] + 1):
+        slot = np.searchsorted(block, cells + block[0])
+        take = (block[slot] == cells + block[0]) & (z <= hi_b[slot])
+        slot, z = slot[take], z[take]
+        under = z < lo_b[slot]
+        below += np.bincount(slot[under], minlength=len(block))
+        slot, z = slot[~under], z[~under]
+        bucket = np.clip(((z - lo_b[slot]) / span[slot] * bins).astype(np.int64), 0, bins - 1)
+        # Only the buckets hit by this chunk are touched, no full-size temporary
+        keys, hits = np.unique(slot * bins + bucket, return_counts=True)
+        histogram.ravel()[keys] += hits.astype(np.int32)
+
+    np.cumsum(histogram, axis=1, out=histogram)
+    # Bucket holding the middle point: number of cumulative counts still at or below its rank
+    remaining = rank[block] - below
+    bucket = np.zeros(len(block), dtype=np.int64)
+    for b in range(bins - 1):
+        bucket += histogram[:, b] <= remaining
+    width = span / bins
+    # A hair of margin so rounding at the bucket edges cannot push the middle point out
+    margin = width * 1e-6
+    lo[block], hi[block] = lo_b + bucket * width - margin, lo_b + (bucket + 1) * width + margin
+
+
+def binned_median_z(las_path, grid, chunk_points=CHUNK_POINTS, bins=MEDIAN_BINS,
+                    tolerance=MEDIAN_TOLERANCE, max_histogram_bytes=MAX_HISTOGRAM_BYTES,
+                    max_passes=MEDIAN_MAX_PASSES):
+    """
+    Median Z per grid cell of a LAS/LAZ file, streamed so that only per-cell arrays
+    are held in memory, never the points.
+
+    A first pass gathers each cell's count and Z range. Each refinement level then
+    fills a 'bins'-bucket histogram per cell between the cell's current bounds and
+    narrows the bounds to the bucket holding the middle point (the lower one for
+    even counts); cells within 'tolerance' drop out. Outliers only cost a level or
+    two; they do not bias the result. A level reads the file once if the histograms
+    of the cells still refining fit in max_histogram_bytes, and once per block of
+    cells otherwise, so large grids cost more reads on the first levels and fewer
+    as cells converge. The reads of the file are capped at max_passes: cells not
+    converged by then take the centre of their bounds, trading precision (printed)
+    for a bounded run time.
+
+    Returns:
+        tuple: (median, count) arrays of length nx * ny; median is NaN for empty cells.
+    """
+    n_cells = grid["nx"] * grid["ny"]
+    count = np.zeros(n_cells, dtype=np.int64)
+    lo = np.full(n_cells, np.inf)
+    hi = np.full(n_cells, -np.inf)
+    for cells, z in _cell_z(las_path, grid, chunk_points):
+        count += np.bincount(cells, minlength=n_cells)
+        np.minimum.at(lo, cells, z)
+        np.maximum.at(hi, cells, z)
+    passes = 1
+
+    rank = (count - 1) // 2
+    active = (count > 0) & (hi - lo > tolerance)
+    block_cells = max(1, max_histogram_bytes // (bins * 4))
+    while active.any() and passes < max_passes:
+        refining = np.flatnonzero(active)
+        for first in range(0, len(refining), block_cells):
+            if passes >= max_passes:
+                break
+            _refine_cells(las_path, grid, chunk_points, refining[first:first + block_cells], lo, hi, rank, bins)
+            passes += 1
+        active &= hi - lo > tolerance
+
+    if active.any():
+        print(f"Median of {np.count_nonzero(active)} cell(s) stopped after {max_passes} passes over {las_path}, "
+              f"within {np.max(hi[active] - lo[active]) / 2:.3f} of the true median")
+    median = (lo + hi) / 2.0
+    median[count == 0] = np.nan
+    return median, count
+
+
+def _design_matrix(x, y, degree):
+    """Polynomial terms x^i * y^j with i + j <= degree."""
+    return np.column_stack([x ** i * y ** j for i in range(degree + 1) for j in range(degree + 1 - i)])
+
+
+def fit_offset_surface(grid, offsets, valid, degree=1, reject_sigma=3.0, iterations=3):
+    """
+    Least-squares polynomial surface through the per-cell offsets, re-fitted a few
+    times without the cells further than reject_sigma standard deviations away
+    (vegetation, edges, moved objects).
+
+    Returns:
+        dict: 'degree', 'coefficients', 'x0', 'y0', 'scale', 'extent', 'rms' and 'cells_used'.
+    """
+    row, col = np.divmod(np.flatnonzero(valid), grid["nx"])
+    scale = grid["cell_size"] * max(grid["nx"], grid["ny"])
+    x = (col + 0.5) * grid["cell_size"] / scale
+    y = (row + 0.5) * grid["cell_size"] / scale
+    values = offsets[valid]
+    design = _design_matrix(x, y, degree)
+
+    keep = np.ones(len(values), dtype=bool)
+    for _ in range(iterations):
+        coefficients, *_ = np.linalg.lstsq(design[keep], values[keep], rcond=None)
+        residuals = values - design @ coefficients
+        sigma = residuals[keep].std()
+        new_keep = np.abs(residuals) <= reject_sigma * sigma if sigma > 0 else keep
+        if np.array_equal(new_keep, keep):
+            break
+        keep = new_keep
+
+    return {
+        "degree": degree,
+        "coefficients": coefficients,
+        "x0": grid["x0"],
+        "y0": grid["y0"],
+        "scale": scale,
+        # (xmin, ymin, xmax, ymax) of the overlap; the surface is not extrapolated beyond it
+        "extent": (grid["x0"], grid["y0"], grid["x0"] + grid["nx"] * grid["cell_size"],
+                   grid["y0"] + grid["ny"] * grid["cell_size"]),
+        "rms": float(np.sqrt(np.mean(residuals[keep] ** 2))),
+        "cells_used": int(keep.sum()),
+    }
+
+
+def evaluate_surface(surface, x, y):
+    """
+    Offset of the fitted surface at world coordinates x, y. Points outside the overlap
+    get the offset of the nearest point on its edge, so a degree 2+ surface is never
+    extrapolated.
+    """
+    xmin, ymin, xmax, ymax = surface["extent"]
+    xn = (np.clip(x, xmin, xmax) - surface["x0"]) / surface["scale"]
+    yn = (np.clip(y, ymin, ymax) - surface["y0"]) / surface["scale"]
+    return _design_matrix(xn, yn, surface["degree"]) @ surface["coefficients"]
+
+
+def estimate_vertical_offset(reference_path, adjusted_path, cell_size=2.0, degree=1,
+                             min_points=MIN_POINTS_PER_CELL, chunk_points=CHUNK_POINTS):
+    """
+    Estimates the spatially varying vertical offset that brings adjusted_path
+    (e.g. the Pix4D cloud) onto reference_path, from the cells where both clouds
+    have points.
+
+    Returns:
+        tuple: (surface, grid, cell_offsets) where cell_offsets is NaN outside the
+               overlap; surface is None if the clouds do not overlap.
+    """
+    grid = overlap_grid(reference_path, adjusted_path, cell_size)
+    if grid is None:
+        print("The two clouds do not overlap.")
+        return None, None, None
+
+    reference_z, reference_count = binned_median_z(reference_path, grid, chunk_points)
+    adjusted_z, adjusted_count = binned_median_z(adjusted_path, grid, chunk_points)
+    valid = (reference_count >= min_points) & (adjusted_count >= min_points)
+    if valid.sum() < (degree + 1) * (degree + 2) // 2:
+        print(f"Only {int(valid.sum())} overlapping cell(s); not enough to fit a degree {degree} surface.")
+        return None, grid, None
+
+    cell_offsets = np.full(grid["nx"] * grid["ny"], np.nan)
+    cell_offsets[valid] = reference_z[valid] - adjusted_z[valid]
+    surface = fit_offset_surface(grid, cell_offsets, valid, degree)
+
+    values = cell_offsets[valid]
+    print(f"Overlap: {int(valid.sum())} cell(s) of {cell_size} m. Offset mean {values.mean():.3f} m, "
+          f"median {np.median(values):.3f} m, std {values.std():.3f} m.")
+    print(f"Degree {degree} surface fitted on {surface['cells_used']} cell(s), RMS residual {surface['rms']:.3f} m.")
+    return surface, grid, cell_offsets
+
+
+def apply_vertical_offset(input_path, output_path, surface, grid=None, cell_offsets=None,
+                          chunk_points=CHUNK_POINTS):
+    """
+    Writes a copy of input_path with Z shifted by the offset surface, chunk by
+    chunk. When grid and cell_offsets are given, points in an overlap cell get that
+    cell's own measured offset and the surface is only used everywhere else.
+    """
+    with laspy.open(input_path) as reader, laspy.open(output_path, mode='w', header=reader.header) as writer:
+        for points in reader.chunk_iterator(chunk_points):
+            x, y = np.asarray(points.x), np.asarray(points.y)
+            offset = evaluate_surface(surface, x, y)
+            if grid is not None and cell_offsets is not None:
+                cells, inside = _cell_index(grid, x, y)
+                measured = np.full(len(x), np.nan)
+                measured[inside] = cell_offsets[cells[inside]]
+                offset = np.where(np.isnan(measured), offset, measured)
+            points.z = np.asarray(points.z) + offset
+            writer.write_points(points)
+    print(f"Adjusted point cloud saved as: {output_path}")
+
+
+if __name__ == "__main__":
+    cloud1_file = r"D:\cropped cloud\cropped_cloud.las"  # Reference cloud
+    cloud2_file = r"C:\Users\olivi\Desktop\Pix4Dmatic processing\sept_15_flt_2_missing_data\exports\sept_15_flt_2_missing_data-dense_point_cloud.las"  # Cloud to adjust
+    output_file = "adjusted_sept_15_flt_2_missing_data_chunk_E.laz"
+
+    surface, grid, cell_offsets = estimate_vertical_offset(cloud1_file, cloud2_file, cell_size=2.0, degree=2)
+    if surface is not None:
+        apply_vertical_offset(cloud2_file, output_file, surface, grid, cell_offsets)
@@ -0,0 +1,203 @@
+import os
+import time
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import geopandas as gpd
+
+# Components of a shapefile, including the spatial indexes and metadata QGIS/ArcGIS
+# write next to it; an old output's leftovers with these extensions are removed, so a
+# stale index never describes the new geometry.
+SHAPEFILE_EXTENSIONS = ('.shp', '.shx', '.dbf', '.prj', '.cpg', '.qpj', '.qix', '.sbn', '.sbx', '.shp.xml')
+
+# Multi-dot sidecars that os.path.splitext would split at the wrong dot
+COMPOUND_EXTENSIONS = ('.shp.xml', '.aux.xml')
+
+_ROW_KEYS = ("features", "written", "warnings", "load_s", "process_s", "save_s")
+
+
+def split_component(name):
+    """Splits 'Tile 3.shp.xml' into ('Tile 3', '.shp.xml') and 'Tile 3.dbf' into ('Tile 3', '.dbf')."""
+    lower = name.lower()
+    for ext in COMPOUND_EXTENSIONS:
+        if lower.endswith(ext):
+            return name[:-len(ext)], ext
+    stem, ext = os.path.splitext(name)
+    return stem, ext.lower()
+
+
+def list_shapefiles(folder):
+    """
+    Lists a folder once and groups every file by stem (case-insensitively).
+
+    Returns:
+        dict: {stem: {extension: path}} for each stem that has a .shp, sorted by stem.
+    """
+    groups = {}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            stem, ext = split_component(entry.name)
+            group = groups.setdefault(stem.lower(), {})
+            group[ext] = entry.path
+    shapefiles = {}
+    for key in sorted(groups):
+        group = groups[key]
+        if '.shp' in group:
+            shapefiles[split_component(os.path.basename(group['.shp']))[0]] = group
+    return shapefiles
+
+
+def _move_all(moves):
+    """os.replace each (source, destination) in order; on failure undoes the ones done and re-raises."""
+    done = []
+    try:
+        for source, destination in moves:
+            os.replace(source, destination)
+            done.append((source, destination))
+    except OSError:
+        for source, destination in reversed(done):
+            os.replace(destination, source)
+        raise
+
+
+def _existing_components(output_folder, stem, old_dir, extra_names=()):
+    """(path, path inside old_dir) for each component of output_folder/stem that exists."""
+    names = {stem + ext for ext in SHAPEFILE_EXTENSIONS} | set(extra_names)
+    return [(os.path.join(output_folder, name), os.path.join(old_dir, name))
+            for name in sorted(names) if os.path.exists(os.path.join(output_folder, name))]
+
+
+def remove_atomic(output_path):
+    """
+    Removes a previous shapefile output, all or nothing: its components are moved
+    aside into a temporary folder (reverted if one is locked) and then deleted.
+
+    Returns:
+        int: Number of components removed.
+    """
+    output_folder = os.path.dirname(os.path.abspath(output_path))
+    stem = os.path.splitext(os.path.basename(output_path))[0]
+    temp_dir = tempfile.mkdtemp(prefix='.removing_', dir=output_folder)
+    try:
+        backup = _existing_components(output_folder, stem, temp_dir)
+        _move_all(backup)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return len(backup)
+
+
+def write_atomic(gdf, output_path, encoding='UTF-8'):
+    """
+    Saves a GeoDataFrame as a shapefile, all or nothing. All components are first
+    written into a temporary folder next to output_path. The previous output's
+    components are then moved aside into that folder and the new ones renamed into
+    place. If any rename fails (e.g. the old output is open in QGIS on Windows),
+    the renames already done are reverted, so the previous output is left as it
+    was. Components of the previous output that the new one does not have are
+    removed with the temporary folder.
+    """
+    output_folder = os.path.dirname(os.path.abspath(output_path))
+    stem = os.path.splitext(os.path.basename(output_path))[0]
+    temp_dir = tempfile.mkdtemp(prefix='.writing_', dir=output_folder)
+    try:
+        new_dir = os.path.join(temp_dir, 'new')
+        old_dir = os.path.join(temp_dir, 'previous')
+        os.makedirs(new_dir)
+        os.makedirs(old_dir)
+        gdf.to_file(os.path.join(new_dir, stem + '.shp'), encoding=encoding)
+        new_names = os.listdir(new_dir)
+
+        backup = _existing_components(output_folder, stem, old_dir, new_names)
+        _move_all(backup)
+        try:
+            _move_all([(os.path.join(new_dir, name), os.path.join(output_folder, name)) for name in new_names])
+        except OSError:
+            _move_all([(destination, source) for source, destination in backup])
+            raise
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def process_file(components, output_path, process, kwargs):
+    """
+    Reads one shapefile in place, runs process(gdf, **kwargs) -> (GeoDataFrame, info dict)
+    on it and writes the result atomically. Empty results are not written, and a
+    previous output for the file is removed so it cannot be mistaken for the result.
+
+    Returns:
+        dict: 'features', 'written', 'load_s', 'process_s', 'save_s', plus process's info.
+    """
+    row = {"features": 0, "written": 0, "warnings": []}
+    if '.prj' not in components:
+        row["warnings"].append("no .prj file, the CRS is unknown")
+
+    start = time.time()
+    gdf = gpd.read_file(components['.shp'])
+    row["features"] = len(gdf)
+    row["load_s"] = time.time() - start
+
+    start = time.time()
+    out, info = process(gdf, **kwargs)
+    row["warnings"].extend(info.pop("warnings", []))
+    row.update(info)
+    row["process_s"] = time.time() - start
+
+    start = time.time()
+    if len(out):
+        write_atomic(out, output_path)
+        row["written"] = len(out)
+    elif remove_atomic(output_path):
+        row["warnings"].append("no features left, the previous output was removed")
+    row["save_s"] = time.time() - start
+    return row
+
+
+def _run_one(stem, components, output_path, process, kwargs):
+    try:
+        return stem, process_file(components, output_path, process, kwargs), None
+    except Exception as e:
+        return stem, None, str(e)
+
+
+def run_batch(input_folder, output_folder, process, max_workers=None, **kwargs):
+    """
+    Runs process(gdf, **kwargs) on every shapefile of input_folder, one file per
+    worker process, and saves each result under the same name in output_folder.
+    process must be a module-level function so it can be sent to the workers.
+
+    Returns:
+        dict: {stem: result row from process_file(), or None if the file failed}
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    shapefiles = list_shapefiles(input_folder)
+    total = len(shapefiles)
+    print(f"Processing {total} shapefile(s) from '{input_folder}' with {max_workers or os.cpu_count()} worker process(es)")
+
+    results = {}
+    batch_start = time.time()
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_run_one, stem, components, os.path.join(output_folder, stem + '.shp'), process, kwargs)
+                   for stem, components in shapefiles.items()]
+        for i, future in enumerate(as_completed(futures), 1):
+            stem, row, error = future.result()
+            results[stem] = row
+            if error:
+                print(f"[{i}/{total}] ! Failed to process {stem}: {error}")
+                continue
+            for warning in row["warnings"]:
+                print(f"[{i}/{total}] WARNING {stem}: {warning}")
+            if not row["written"]:
+                print(f"[{i}/{total}] ! No features left in {stem}, nothing saved")
+                continue
+            extra = ", ".join(f"{k} {v:.2f}" if isinstance(v, float) else f"{k} {v}"
+                              for k, v in row.items() if k not in _ROW_KEYS)
+            print(f"[{i}/{total}] ✓ {stem}: {row['features']} -> {row['written']} feature(s)"
+                  f"{' (' + extra + ')' if extra else ''} "
+                  f"(load {row['load_s']:.2f} s, process {row['process_s']:.2f} s, save {row['save_s']:.2f} s)")
+
+    done = sum(1 for row in results.values() if row and row["written"])
+    print(f"\nProcessed {done} of {total} shapefile(s) in {time.time() - batch_start:.1f} s")
+    return results
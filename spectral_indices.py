@@ -0,0 +1,180 @@
+import os
+import re
+import numpy as np
+from osgeo import gdal
+
+import envi_header
+from chart_of_minerals import minerals, vnir_range
+from veg_detector import iter_block_windows
+
+# Index definitions: name -> (kind, wavelengths in nm)
+#   'nd'    : normalized difference (a - b) / (a + b)
+#   'ratio' : band ratio a / b
+#   'depth' : mean relative band depth 1 - R(c) / mean(R(c - s), R(c + s)) over the
+#             absorption centres c, with shoulders s = DEPTH_SHOULDER_NM either side
+BASE_INDICES = {
+    "NDVI": ("nd", (800.0, 670.0)),
+    "GRR": ("nd", (551.413330, 681.534497)),
+    "REVI": ("nd", (741.319898, 681.534497)),
+    "RED_GREEN": ("ratio", (681.534497, 551.413330)),  # iron oxide / hematite stain
+}
+
+DEPTH_SHOULDER_NM = 30.0
+
+# Tiled float output; PREDICTOR=3 is the floating-point predictor
+FLOAT_GTIFF_OPTIONS = ['TILED=YES', 'BLOCKXSIZE=256', 'BLOCKYSIZE=256',
+                       'COMPRESS=DEFLATE', 'PREDICTOR=3', 'BIGTIFF=IF_SAFER']
+
+
+def mineral_indices(mineral_table=minerals):
+    """
+    Builds one band-depth index per mineral from its absorption features
+    (given in µm, as in chart_of_minerals.minerals). The shoulders are placed at
+    evaluation time, from compute_spectral_indices()' shoulder_nm.
+    """
+    indices = {}
+    for name, features_um in mineral_table.items():
+        key = "BD_" + re.sub(r'\W+', '_', name).strip('_').upper()
+        indices[key] = ("depth", tuple(wl * 1000.0 for wl in features_um))
+    return indices
+
+
+def _required_wavelengths(kind, wavelengths, shoulder_nm):
+    if kind == "depth":
+        return [w for c in wavelengths for w in (c - shoulder_nm, c, c + shoulder_nm)]
+    return list(wavelengths)
+
+
+def cube_wavelengths(cube_path, n_bands, fallback_range=vnir_range):
+    """
+    Band-centre wavelengths (nm) of a cube, from its ENVI header when there is one.
+    Otherwise evenly spaced over fallback_range, like veg_detector assumes.
+    """
+    hdr_path = envi_header.find_header(cube_path)
+    if hdr_path:
+        wavelengths = envi_header.read_wavelengths(hdr_path)
+        if wavelengths and len(wavelengths) == n_bands:
+            return np.asarray(wavelengths, dtype=np.float64)
+        print(f"Warning: '{hdr_path}' has no usable wavelength list for {n_bands} bands.")
+    print(f"Warning: Assuming evenly spaced wavelengths over {fallback_range} nm.")
+    return np.linspace(fallback_range[0], fallback_range[1], n_bands)
+
+
+def nearest_bands(wavelengths, requested):
+    """
+    Maps each requested wavelength to the 1-based band with the nearest centre.
+    Wavelengths further than one band spacing outside the cube's range map to None.
+    The band centres do not have to be in ascending order.
+    """
+    wavelengths = np.asarray(wavelengths, dtype=np.float64)
+    ordered = np.sort(wavelengths)
+    spacing = float(np.median(np.diff(ordered))) if len(ordered) > 1 else 0.0
+    lo, hi = ordered[0] - spacing, ordered[-1] + spacing
+    lookup = {}
+    for wl in requested:
+        if lo <= wl <= hi:
+            lookup[wl] = int(np.argmin(np.abs(wavelengths - wl))) + 1
+        else:
+            lookup[wl] = None
+    return lookup
+
+
+def _evaluate(kind, wavelengths, bands, band_data, shoulder_nm):
+    eps = 1e-6
+    if kind == "nd":
+        a, b = (band_data[bands[w]] for w in wavelengths)
+        return (a - b) / (a + b + eps)
+    if kind == "ratio":
+        a, b = (band_data[bands[w]] for w in wavelengths)
+        return a / (b + eps)
+    depths = []
+    for c in wavelengths:
+        left, centre, right = (band_data[bands[w]] for w in (c - shoulder_nm, c, c + shoulder_nm))
+        depths.append(1.0 - centre / (0.5 * (left + right) + eps))
+    return np.mean(depths, axis=0)
+
+
+def compute_spectral_indices(cube_path, indices=None, output_path=None, shoulder_nm=DEPTH_SHOULDER_NM):
+    """
+    Computes many spectral indices from a hyperspectral cube in a single pass and
+    writes them as one multi-band float32 GeoTIFF (one band per index, named in the
+    band description).
+
+    Band centres come from the 'wavelength' list of the cube's ENVI header and each
+    requested wavelength is matched to the nearest band. The cube is streamed window
+    by window; in each window every band needed by any index is read exactly once.
+    Indices whose wavelengths fall outside the sensor's range (e.g. SWIR minerals on
+    a VNIR cube) are skipped.
+
+    Args:
+        cube_path (str): Path of the cube (any GDAL-readable raster).
+        indices (dict): name -> (kind, wavelengths). Defaults to BASE_INDICES plus one
+                        band-depth index per mineral in chart_of_minerals.
+        output_path (str): Defaults to '<cube>_spectral_indices.tif'.
+        shoulder_nm (float): Shoulder offset for band-depth indices.
+
+    Returns:
+        str: Path of the written GeoTIFF, or None if no index could be computed.
+    """
+    gdal.UseExceptions()
+    if indices is None:
+        indices = {**BASE_INDICES, **mineral_indices()}
+
+    ds = gdal.Open(cube_path, gdal.GA_ReadOnly)
+    wavelengths = cube_wavelengths(cube_path, ds.RasterCount)
+
+    requested = {w for kind, wls in indices.values() for w in _required_wavelengths(kind, wls, shoulder_nm)}
+    bands = nearest_bands(wavelengths, requested)
+
+    active = {}
+    for name, (kind, wls) in indices.items():
+        if kind == "depth":
+            # Keep only the absorption features the sensor actually covers
+            wls = tuple(c for c in wls if all(bands[w] for w in _required_wavelengths(kind, (c,), shoulder_nm)))
+            if not wls:
+                continue
+        elif not all(bands[w] for w in wls):
+            continue
+        active[name] = (kind, wls)
+
+    if not active:
+        print(f"No requested index falls inside the wavelength range of '{cube_path}'.")
+        return None
+
+    needed_bands = sorted({bands[w] for kind, wls in active.values()
+                           for w in _required_wavelengths(kind, wls, shoulder_nm)})
+    print(f"Computing {len(active)} indices from {len(needed_bands)} of {ds.RasterCount} bands: "
+          f"{', '.join(active)}")
+
+    if output_path is None:
+        output_path = f"{os.path.splitext(cube_path)[0]}_spectral_indices.tif"
+    driver = gdal.GetDriverByName('GTiff')
+    out_ds = driver.Create(output_path, ds.RasterXSize, ds.RasterYSize, len(active), gdal.GDT_Float32,
+                           options=FLOAT_GTIFF_OPTIONS)
+    out_ds.SetGeoTransform(ds.GetGeoTransform())
+    out_ds.SetProjection(ds.GetProjection())
+    out_bands = []
+    for i, name in enumerate(active, start=1):
+        band = out_ds.GetRasterBand(i)
+        band.SetDescription(name)
+        out_bands.append(band)
+
+    src_bands = {b: ds.GetRasterBand(b) for b in needed_bands}
+    for xoff, yoff, cols, rows in iter_block_windows(src_bands[needed_bands[0]]):
+        band_data = {b: src.ReadAsArray(xoff, yoff, cols, rows).astype(np.float32)
+                     for b, src in src_bands.items()}
+        for out_band, (kind, wls) in zip(out_bands, active.values()):
+            out_band.WriteArray(_evaluate(kind, wls, bands, band_data, shoulder_nm).astype(np.float32),
+                                xoff, yoff)
+
+    out_ds.FlushCache()
+    out_ds = None
+    ds = None
+
+    print(f"Saved {len(active)} spectral indices to:\n  {output_path}")
+    return output_path
+
+
+if __name__ == "__main__":
+    input_path = r"Y:\TECK_WHITE_EARTH\TECK_HYPERSPEC\0702\T1_VNIR\TECK_T1_F1_F2_2025_07_02_17_38_03_042\raw_104858.tif"
+    compute_spectral_indices(input_path)
@@ -0,0 +1,267 @@
+import os
+import csv
+import hashlib
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import bulk_mover
+
+DEFAULT_HASH_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".rosor", "hash_cache.sqlite")
+DEFAULT_HASH_WORKERS = 8
+
+# 'sampled' hashes the size plus SAMPLE_COUNT blocks spread evenly through the file:
+# enough to catch truncated or partially written uploads at a fraction of the I/O.
+SAMPLE_BLOCK_SIZE = 1024 * 1024
+SAMPLE_COUNT = 4
+HASH_MODES = (None, 'sampled', 'full')
+
+
+def list_tree(root, extensions=None, exclude=None):
+    """
+    Returns {relative path: (size, mtime)} for every file under root, optionally
+    only those with one of the given extensions (e.g. ('.laz',)). The 'exclude'
+    folder (e.g. a destination inside root) is not descended into.
+    """
+    extensions = tuple(e.lower() for e in extensions) if extensions else None
+    exclude = os.path.normcase(os.path.abspath(exclude)) if exclude else None
+    listing = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        if exclude:
+            dirnames[:] = [d for d in dirnames
+                           if os.path.normcase(os.path.abspath(os.path.join(dirpath, d))) != exclude]
+        for filename in filenames:
+            if extensions and not filename.lower().endswith(extensions):
+                continue
+            path = os.path.join(dirpath, filename)
+            st = os.stat(path)
+            listing[os.path.relpath(path, root)] = (st.st_size, st.st_mtime)
+    return listing
+
+
+def write_listing(root, output_csv, extensions=None, hash_mode=None):
+    """
+    Exports a listing manifest of a tree (relative path, size, mtime and optionally a
+    hash) so it can be diffed later against a folder that is not reachable from here.
+    """
+    listing = list_tree(root, extensions)
+    hashes = hash_files({rel: os.path.join(root, rel) for rel in listing}, hash_mode) if hash_mode else {}
+    with open(output_csv, mode='w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        # The column name records the hash mode: 'hash_sampled' and 'hash_full' digests never compare equal
+        writer.writerow(['path', 'size', 'mtime', f'hash_{hash_mode}' if hash_mode else 'hash'])
+        for rel in sorted(listing):
+            size, mtime = listing[rel]
+            writer.writerow([rel, size, mtime, hashes.get(rel, '')])
+    print(f"File list exported to {output_csv}")
+
+
+def read_listing(listing_csv):
+    """
+    Reads a listing manifest written by write_listing(). Plain one-name-per-line
+    lists (as exported by the old notebook) are accepted too; their sizes are None.
+
+    Returns:
+        tuple: ({relative path: size or None}, {relative path: hash}, hash mode or None)
+    """
+    sizes, hashes = {}, {}
+    hash_mode = None
+    with open(listing_csv, newline='') as csvfile:
+        rows = list(csv.reader(csvfile))
+    if rows and rows[0][:2] == ['path', 'size']:
+        if len(rows[0]) > 3 and rows[0][3].startswith('hash_'):
+            hash_mode = rows[0][3][len('hash_'):]
+        for row in rows[1:]:
+            sizes[os.path.normpath(row[0])] = int(row[1])
+            if len(row) > 3 and row[3]:
+                hashes[os.path.normpath(row[0])] = row[3]
+    else:
+        for row in rows:
+            if row and row[0].strip():
+                sizes[os.path.normpath(row[0].strip())] = None
+    return sizes, hashes, hash_mode
+
+
+def _hash_file(path, mode):
+    if mode == 'full':
+        return bulk_mover.file_checksum(path)
+    size = os.path.getsize(path)
+    digest = hashlib.blake2b(str(size).encode())
+    with open(path, 'rb') as f:
+        if size <= SAMPLE_BLOCK_SIZE * SAMPLE_COUNT:
+            digest.update(f.read())
+        else:
+            # First block at the start, last block flush with the end of the file
+            for i in range(SAMPLE_COUNT):
+                f.seek(i * (size - SAMPLE_BLOCK_SIZE) // (SAMPLE_COUNT - 1))
+                digest.update(f.read(SAMPLE_BLOCK_SIZE))
+    return digest.hexdigest()
+
+
+def open_hash_cache(db_path=DEFAULT_HASH_CACHE_PATH):
+    """Opens (and creates, if needed) the local cache of file hashes."""
+    folder = os.path.dirname(db_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("""CREATE TABLE IF NOT EXISTS hashes (
+                        path  TEXT,
+                        mode  TEXT,
+                        size  INTEGER,
+                        mtime REAL,
+                        hash  TEXT,
+                        PRIMARY KEY (path, mode))""")
+    return conn
+
+
+def hash_files(paths, mode='sampled', max_workers=DEFAULT_HASH_WORKERS, cache_path=DEFAULT_HASH_CACHE_PATH):
+    """
+    Hashes files in parallel. A file is only read when its (size, mtime) differs
+    from the cached one.
+
+    Args:
+        paths (dict): {key: file path}; the result uses the same keys.
+        mode (str): 'sampled' or 'full'.
+
+    Returns:
+        dict: {key: hex digest}
+    """
+    if mode not in ('sampled', 'full'):
+        raise ValueError(f"mode must be 'sampled' or 'full', got '{mode}'")
+    conn = open_hash_cache(cache_path)
+    cached = {row[0]: row[1:] for row in
+              conn.execute("SELECT path, size, mtime, hash FROM hashes WHERE mode = ?", (mode,))}
+
+    def work(path):
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        entry = cached.get(path)
+        if entry and (entry[0], entry[1]) == (st.st_size, st.st_mtime):
+            return path, None, entry[2]
+        return path, (st.st_size, st.st_mtime), _hash_file(path, mode)
+
+    results, updates = {}, []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for key, (path, stat, digest) in zip(paths, pool.map(work, paths.values())):
+            results[key] = digest
+            if stat is not None:
+                updates.append((path, mode, *stat, digest))
+    conn.executemany("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)", updates)
+    conn.commit()
+    conn.close()
+    return results
+
+
+def diff_trees(source_root, target, extensions=None, hash_mode=None, exclude=None):
+    """
+    Compares the files under source_root with a target folder, or with a listing
+    manifest CSV of it, by relative path, size and optionally content hash.
+
+    Args:
+        source_root (str): Folder holding the complete set of files.
+        target (str): Folder (or listing CSV) that should hold the same files.
+        extensions (tuple): Only compare files with these extensions.
+        hash_mode (str): None (names and sizes), 'sampled' or 'full'. Against a listing
+                         CSV, hashes are only compared where the listing has them, and
+                         the listing must have been written with the same hash mode.
+        exclude (str): Folder under source_root to leave out of the comparison.
+
+    Returns:
+        dict: 'missing', 'size_mismatch', 'hash_mismatch' and 'extra' lists of
+              relative paths.
+    """
+    if hash_mode not in HASH_MODES:
+        raise ValueError(f"hash_mode must be one of {HASH_MODES}, got '{hash_mode}'")
+
+    source = list_tree(source_root, extensions, exclude)
+    if os.path.isdir(target):
+        target_listing = list_tree(target, extensions)
+        target_sizes = {rel: size for rel, (size, _) in target_listing.items()}
+        target_hashes = None
+    else:
+        target_sizes, target_hashes, listing_mode = read_listing(target)
+        if hash_mode and target_hashes and listing_mode != hash_mode:
+            if listing_mode is None:
+                raise ValueError(f"'{target}' does not record its hash mode; write a new '{hash_mode}' listing")
+            raise ValueError(f"'{target}' holds '{listing_mode}' hashes; "
+                             f"diff it with hash_mode='{listing_mode}' or write a new '{hash_mode}' listing")
+        if extensions:
+            suffixes = tuple(e.lower() for e in extensions)
+            target_sizes = {rel: s for rel, s in target_sizes.items() if rel.lower().endswith(suffixes)}
+
+    missing = sorted(source.keys() - target_sizes.keys())
+    extra = sorted(target_sizes.keys() - source.keys())
+    common = source.keys() & target_sizes.keys()
+    size_mismatch = sorted(rel for rel in common
+                           if target_sizes[rel] is not None and target_sizes[rel] != source[rel][0])
+
+    hash_mismatch = []
+    if hash_mode:
+        to_hash = sorted(common - set(size_mismatch))
+        if target_hashes is not None:
+            to_hash = [rel for rel in to_hash if rel in target_hashes]
+        source_hashes = hash_files({rel: os.path.join(source_root, rel) for rel in to_hash}, hash_mode)
+        if target_hashes is None:
+            target_hashes = hash_files({rel: os.path.join(target, rel) for rel in to_hash}, hash_mode)
+        hash_mismatch = [rel for rel in to_hash if source_hashes[rel] != target_hashes[rel]]
+
+    return {"missing": missing, "size_mismatch": size_mismatch, "hash_mismatch": hash_mismatch, "extra": extra}
+
+
+def plan_copy(source_root, destination_root, relative_paths):
+    """Builds a bulk_mover manifest that copies the given relative paths from source_root to destination_root."""
+    manifest = {"folders": [], "dirs": [], "files": []}
+    dirs = set()
+    for rel in relative_paths:
+        source_path = os.path.join(source_root, rel)
+        destination_path = os.path.join(destination_root, rel)
+        dirs.add(os.path.dirname(destination_path))
+        manifest["files"].append({
+            "source": source_path,
+            "destination": destination_path,
+            "size": os.path.getsize(source_path),
+            "status": "pending",
+        })
+    manifest["dirs"] = sorted(dirs)
+    return manifest
+
+
+def copy_missing(source_root, target, destination_root=None, extensions=None, hash_mode=None,
+                 max_workers=bulk_mover.DEFAULT_WORKERS):
+    """
+    Diffs source_root against target and copies every missing or corrupted
+    (different size or hash) file to destination_root, which defaults to the
+    target folder itself. Extra files in the target are only reported.
+    """
+    diff = diff_trees(source_root, target, extensions, hash_mode, exclude=destination_root)
+    print(f"Missing: {len(diff['missing'])}, size mismatch: {len(diff['size_mismatch'])}, "
+          f"hash mismatch: {len(diff['hash_mismatch'])}, extra in target: {len(diff['extra'])}")
+    for rel in diff["extra"]:
+        print(f"  Extra: {rel}")
+
+    to_copy = diff["missing"] + diff["size_mismatch"] + diff["hash_mismatch"]
+    if not to_copy:
+        print("Nothing to copy.")
+        return diff
+
+    if destination_root is None:
+        if not os.path.isdir(target):
+            raise ValueError("destination_root is required when the target is a listing file")
+        destination_root = target
+    os.makedirs(destination_root, exist_ok=True)
+
+    manifest = plan_copy(source_root, destination_root, to_copy)
+    manifest_path = os.path.join(destination_root, bulk_mover.MANIFEST_NAME)
+    done, failed, bytes_copied = bulk_mover.run_manifest(manifest, manifest_path, max_workers,
+                                                         delete_source=False)
+    print(f"\nCopied {done} file(s) ({bytes_copied / 1e9:.2f} GB), {failed} failed.")
+    if failed == 0:
+        os.remove(manifest_path)
+    return diff
+
+
+if __name__ == "__main__":
+    source_folder = r"D:\Surface pointcloud tiles\batch upload 2"
+    upload_listing = r"D:\Surface pointcloud tiles\batch upload 2\file_name_list (5).csv"
+    destination_folder = r"D:\Surface pointcloud tiles\batch upload 2\missing tiles"
+
+    copy_missing(source_folder, upload_listing, destination_folder, extensions=('.laz',))
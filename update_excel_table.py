@@ -11,6 +11,8 @@ import json
 import xml.etree.ElementTree as ET
 from openpyxl import load_workbook as openpyxl_load_workbook
 
+import nas_index
+
 
 # Setup logging for debugging
 logging.basicConfig(level=logging.DEBUG, format='[DEBUG] %(message)s')
@@ -90,9 +92,14 @@ def natural_sort_key(s):
     return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', s)]
 
 
-def get_list_of_teck_folders(folder_path, prefix="TECK_T"):
+def get_list_of_teck_folders(folder_path, prefix="TECK_T", index=None):
+    """
+    Lists the VNIR flight folders under folder_path. When an open nas_index
+    connection is given, the (already refreshed) index is walked instead of the share.
+    """
     matches = []
-    for root, dirs, _ in os.walk(folder_path):
+    walker = nas_index.walk_index(index, folder_path) if index is not None else os.walk(folder_path)
+    for root, dirs, _ in walker:
         if "dark_" in root or any(part.lower() == "old" for part in root.split(os.sep)):
             dirs[:] = []
             continue
@@ -117,9 +124,10 @@ def _parse_folder_timestamp(name: str) -> datetime.datetime | None:
     return datetime.datetime(year, mon, day, hr, mi, sec, us)
 
 
-def build_swir_index(base_folder: str) -> dict[str, list[tuple[datetime.datetime, str]]]:
+def build_swir_index(base_folder: str, index=None) -> dict[str, list[tuple[datetime.datetime, str]]]:
     swir_index: dict[str, list[tuple[datetime.datetime, str]]] = {}
-    for root, dirs, _ in os.walk(base_folder):
+    walker = nas_index.walk_index(index, base_folder) if index is not None else os.walk(base_folder)
+    for root, dirs, _ in walker:
         if "dark_" in root or any(p.lower() == "old" for p in root.split(os.sep)):
             dirs[:] = []
             continue
@@ -214,9 +222,14 @@ def find_date_folder_code(path):
 
 
 
+# 0) Refresh the shared directory index once; both walks below read from it
+dir_index = nas_index.open_index()
+rescanned, reused = nas_index.refresh_index(dir_index, input_folder)
+logging.debug(f"Directory index refreshed: {rescanned} re-listed, {reused} unchanged")
+
 # 1) Build SWIR index
 #    (unchanged)
-swir_index = build_swir_index(input_folder)
+swir_index = build_swir_index(input_folder, dir_index)
 
 # 1.5) Build 2D KML index entries
 logging.debug("Building 2D KML index…")
@@ -264,7 +277,7 @@ if "[E] Notes" not in editable_cols:
 output_excel = make_unique_filename(base_output)
 
 # 4) Collect VNIR folders
-vnir_folders = get_list_of_teck_folders(input_folder)
+vnir_folders = get_list_of_teck_folders(input_folder, index=dir_index)
 
 # 5) Create workbook & worksheet
 workbook  = xlsxwriter.Workbook(output_excel)
@@ -327,27 +340,23 @@ for idx, vnir_path in enumerate(vnir_folders):
     swir_path  = find_corresponding_swir(vnir_path, swir_index, match_threshold_seconds)
     swir_name  = os.path.basename(swir_path) if swir_path else ''
 
-    # VNIR checks\
-    over_exp = '✅' if os.path.exists(os.path.join(vnir_path, FILE_ALLCUBES)) else '❌'
-    tarp     = '✅' if os.path.exists(os.path.join(vnir_path, FILE_WHITEREF)) else '❌'
+    # VNIR checks\ (answered from the directory index, no stat on the share)
+    vnir_files = nas_index.list_files(dir_index, vnir_path)
+    over_exp = '✅' if FILE_ALLCUBES in vnir_files else '❌'
+    tarp     = '✅' if FILE_WHITEREF in vnir_files else '❌'
 
     # AllCubes column
-    allcubes_exists = os.path.exists(os.path.join(vnir_path, FILE_ALLCUBES))
+    allcubes_exists = FILE_ALLCUBES in vnir_files
     allcubes_file   = FILE_ALLCUBES if allcubes_exists else ''
     allcubes_path   = os.path.join(vnir_path, FILE_ALLCUBES) if allcubes_exists else ''
 
     # SWIR WhiteRef check
-    swir_whref_exists = bool(swir_path and os.path.exists(os.path.join(swir_path, FILE_WHITEREF)))
+    swir_whref_exists = bool(swir_path and FILE_WHITEREF in nas_index.list_files(dir_index, swir_path))
     swir_whref        = '✅' if swir_whref_exists else '❌'
 
     # SWIR Dark folder check
-    swir_dark_exists = False
-    if swir_path:
-        for sub in os.listdir(swir_path):
-            sub_path = os.path.join(swir_path, sub)
-            if os.path.isdir(sub_path) and 'dark' in sub.lower():
-                swir_dark_exists = True
-                break
+    swir_dark_exists = bool(swir_path and any('dark' in sub.lower()
+                                              for sub in nas_index.list_subdirs(dir_index, swir_path)))
     swir_dark = '✅' if swir_dark_exists else '❌'
 
     logging.debug(
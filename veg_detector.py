@@ -2,6 +2,54 @@ import os
 import numpy as np
 from osgeo import gdal
 
+# Line-interleaved cubes report one-line blocks; windows are grown to at least
+# this many lines so each read is still a reasonable size.
+MIN_WINDOW_ROWS = 256
+
+# Creation options for the block-streamed output.
+TILED_GTIFF_OPTIONS = ['TILED=YES', 'BLOCKXSIZE=256', 'BLOCKYSIZE=256',
+                       'COMPRESS=DEFLATE', 'PREDICTOR=2', 'BIGTIFF=IF_SAFER']
+
+
+def wavelength_to_band(wl, n_bands, vnir_range):
+    """
+    Maps a wavelength (nm) to a 1-based GDAL band index, assuming the bands are
+    evenly spaced across vnir_range.
+    """
+    first_wl, last_wl = vnir_range
+    spacing = (last_wl - first_wl) / (n_bands - 1)
+    idx = int(round((wl - first_wl) / spacing)) + 1
+    return max(1, min(n_bands, idx))
+
+
+def rockveg_index(b_g, b_r, b_re):
+    """Combined green-red / red-edge index: vegetation high, rock low."""
+    eps = 1e-6
+    grr  = (b_g  - b_r)  / (b_g  + b_r  + eps)   # green-red ratio
+    revi = (b_re - b_r)  / (b_re + b_r  + eps)   # red-edge veg index
+    return 0.5 * (grr + revi)
+
+
+def iter_block_windows(band, min_rows=MIN_WINDOW_ROWS):
+    """
+    Yields (xoff, yoff, xsize, ysize) windows covering the band, aligned to its
+    natural block size.
+    """
+    block_x, block_y = band.GetBlockSize()
+    if block_y < min_rows:
+        block_y *= max(1, min_rows // block_y)
+    for yoff in range(0, band.YSize, block_y):
+        rows = min(block_y, band.YSize - yoff)
+        for xoff in range(0, band.XSize, block_x):
+            yield xoff, yoff, min(block_x, band.XSize - xoff), rows
+
+
+def rockveg_output_path(input_tif):
+    """Path of the grayscale written next to the input ('<input>_rock_bright_veg_dark.tif')."""
+    base, ext = os.path.splitext(input_tif)
+    return f"{base}_rock_bright_veg_dark.tif"
+
+
 def tiff_to_rockveg_grayscale(input_tif,
                               target_wls=(551.413330, 681.534497, 741.319898),
                               vnir_range=(398.42, 1001.57)):
@@ -20,14 +68,9 @@ def tiff_to_rockveg_grayscale(input_tif,
     xsize = ds.RasterXSize
     ysize = ds.RasterYSize
 
-    # Compute band spacing (assuming evenly spaced wavelengths)
-    first_wl, last_wl = vnir_range
-    spacing = (last_wl - first_wl) / (n_bands - 1)
-
-    # Map wavelength (nm) to 1-based GDAL band index
+    # Map wavelength (nm) to 1-based GDAL band index (assuming evenly spaced wavelengths)
     def wl_to_band(wl):
-        idx = int(round((wl - first_wl) / spacing)) + 1
-        return max(1, min(n_bands, idx))
+        return wavelength_to_band(wl, n_bands, vnir_range)
 
     # Read the three bands
     b_g  = ds.GetRasterBand(wl_to_band(target_wls[0])).ReadAsArray().astype(np.float32)
@@ -35,20 +78,14 @@ def tiff_to_rockveg_grayscale(input_tif,
     b_re = ds.GetRasterBand(wl_to_band(target_wls[2])).ReadAsArray().astype(np.float32)
     ds = None
 
-    # Compute two normalized-difference indices
-    eps = 1e-6
-    grr  = (b_g  - b_r)  / (b_g  + b_r  + eps)   # green-red ratio
-    revi = (b_re - b_r)  / (b_re + b_r  + eps)   # red-edge veg index
-
     # Combine indices: veg bright → low rock value; invert so rock→bright
-    combined = 0.5 * (grr + revi)
+    combined = rockveg_index(b_g, b_r, b_re)
     mn, mx = combined.min(), combined.max()
     norm = ((combined - mn) / (mx - mn) * 255).astype(np.uint8)
     rock_bright = 255 - norm
 
     # Build output path next to input, appending suffix
-    base, ext = os.path.splitext(input_tif)
-    output_tif = f"{base}_rock_bright_veg_dark.tif"
+    output_tif = rockveg_output_path(input_tif)
 
     # Write out as GeoTIFF
     driver = gdal.GetDriverByName('GTiff')
@@ -59,6 +96,75 @@ def tiff_to_rockveg_grayscale(input_tif,
 
     print(f"Saved rock‐bright grayscale to:\n  {output_tif}")
 
-# Example usage
-input_path = r"Y:\TECK_WHITE_EARTH\TECK_HYPERSPEC\0702\T1_VNIR\TECK_T1_F1_F2_2025_07_02_17_38_03_042\raw_104858.tif"
-tiff_to_rockveg_grayscale(input_path)
+
+def tiff_to_rockveg_grayscale_tiled(input_tif,
+                                    target_wls=(551.413330, 681.534497, 741.319898),
+                                    vnir_range=(398.42, 1001.57)):
+    """
+    Block-streaming version of tiff_to_rockveg_grayscale() for mosaics too large
+    to hold in memory. The three bands are read one window at a time in the
+    raster's natural block layout: a first pass only finds the global min/max of
+    the combined index, a second pass recomputes each window and writes it to a
+    tiled, DEFLATE-compressed GeoTIFF. Peak memory depends on the window size,
+    not on the scene size. The GeoTIFF is written under a temporary name and
+    renamed into place when complete, so an interrupted run never leaves a
+    truncated output that looks up to date.
+
+    Returns:
+        str: Path of the written GeoTIFF.
+    """
+    gdal.UseExceptions()
+
+    ds = gdal.Open(input_tif, gdal.GA_ReadOnly)
+    n_bands = ds.RasterCount
+    bands = [ds.GetRasterBand(wavelength_to_band(wl, n_bands, vnir_range)) for wl in target_wls]
+    windows = list(iter_block_windows(bands[0]))
+
+    def window_index(xoff, yoff, cols, rows):
+        b_g, b_r, b_re = (b.ReadAsArray(xoff, yoff, cols, rows).astype(np.float32) for b in bands)
+        return rockveg_index(b_g, b_r, b_re)
+
+    # Pass 1: global min/max for normalization, nothing is kept
+    mn, mx = np.inf, -np.inf
+    for window in windows:
+        combined = window_index(*window)
+        mn = min(mn, float(combined.min()))
+        mx = max(mx, float(combined.max()))
+    scale = 255.0 / (mx - mn) if mx > mn else 0.0
+
+    output_tif = rockveg_output_path(input_tif)
+    base, ext = os.path.splitext(output_tif)
+    partial_tif = f"{base}.partial{ext}"
+
+    driver = gdal.GetDriverByName('GTiff')
+    try:
+        out_ds = driver.Create(partial_tif, ds.RasterXSize, ds.RasterYSize, 1, gdal.GDT_Byte,
+                               options=TILED_GTIFF_OPTIONS)
+        out_ds.SetGeoTransform(ds.GetGeoTransform())
+        out_ds.SetProjection(ds.GetProjection())
+        out_band = out_ds.GetRasterBand(1)
+
+        # Pass 2: recompute each window and write it straight out
+        for xoff, yoff, cols, rows in windows:
+            combined = window_index(xoff, yoff, cols, rows)
+            norm = ((combined - mn) * scale).astype(np.uint8)
+            out_band.WriteArray(255 - norm, xoff, yoff)
+
+        out_ds.FlushCache()
+        out_ds = out_band = None
+        os.replace(partial_tif, output_tif)
+    except BaseException:
+        out_ds = out_band = None
+        if os.path.exists(partial_tif):
+            os.remove(partial_tif)
+        raise
+    ds = None
+
+    print(f"Saved rock‐bright grayscale to:\n  {output_tif}")
+    return output_tif
+
+
+if __name__ == "__main__":
+    # Example usage
+    input_path = r"Y:\TECK_WHITE_EARTH\TECK_HYPERSPEC\0702\T1_VNIR\TECK_T1_F1_F2_2025_07_02_17_38_03_042\raw_104858.tif"
+    tiff_to_rockveg_grayscale(input_path)